@@ -1,7 +1,7 @@
 ﻿from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, JSON, Index
 from sqlmodel import SQLModel, Field
 
 
@@ -25,6 +25,28 @@ class JobArtifact(SQLModel, table=True):
     type: str
     content: dict = Field(sa_column=Column(JSON))
 
+class TranscriptionCacheEntry(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_transcription_cache_lookup", "video_id", "transcription_model", "chunk_length_ms", "chunking"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    video_id: str
+    transcription_model: str
+    chunk_length_ms: int
+    chunking: str
+    artifact_id: UUID = Field(default=None, foreign_key="jobartifact.id")
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+class TranscriptionModelChunking(SQLModel, table=True):
+    """
+    How the workers of a transcription model currently cut audio into chunks, as reported in their heartbeat.
+    """
+    model_name: str = Field(primary_key=True)
+    chunk_length_ms: int
+    chunking: str
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
 class AvailableModel(SQLModel, table=True):
     name: str = Field(primary_key=True)
     last_seen: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
\ No newline at end of file
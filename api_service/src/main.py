@@ -125,7 +125,7 @@ async def create_job(
         request: CreateJobRequest,
         session: Annotated[Session, Depends(get_session)]
 ):
-    job = Job(**request.model_dump())
+    job = Job(**request.model_dump(exclude={"reuse_transcription"}))
     session.add(job)
     session.commit()
     session.refresh(job)
@@ -143,6 +143,24 @@ async def create_job(
             if job.type == "topics":
                 find_model_or_raise("topics", job.action_models)
 
+            # reuse only what the model's workers would produce now, they may have been reconfigured since
+            model_chunking = session.get(TranscriptionModelChunking, transcription_model)
+
+            if request.reuse_transcription and model_chunking is not None:
+                cached_artifact = find_cached_transcription(
+                    session=session,
+                    video_id=job.video_id,
+                    transcription_model=transcription_model,
+                    chunk_length_ms=model_chunking.chunk_length_ms,
+                    chunking=model_chunking.chunking)
+
+                if cached_artifact is not None:
+                    base_logger.info(f"Reusing transcription artifact {cached_artifact.id}, job_id: {job.id}")
+
+                    chunks = [TranscriptionChunkResult(**c) for c in cached_artifact.content]
+                    await complete_transcription(job, chunks, base_logger, session)
+                    return job
+
             await broker.publish(TranscriptionRequest(
                 job_id = job.id,
                 video_id = job.video_id
@@ -156,6 +174,24 @@ async def create_job(
 
     return job
 
+def find_cached_transcription(
+        session: Session,
+        video_id: str,
+        transcription_model: str,
+        chunk_length_ms: int,
+        chunking: str) -> JobArtifact | None:
+    statement = (
+        select(JobArtifact)
+        .join(TranscriptionCacheEntry, TranscriptionCacheEntry.artifact_id == JobArtifact.id)
+        .where(
+            TranscriptionCacheEntry.video_id == video_id,
+            TranscriptionCacheEntry.transcription_model == transcription_model,
+            TranscriptionCacheEntry.chunk_length_ms == chunk_length_ms,
+            TranscriptionCacheEntry.chunking == chunking)
+        .order_by(TranscriptionCacheEntry.created_at.desc())
+    )
+    return session.exec(statement).first()
+
 @app.get("/jobs/{job_id}", response_model=JobResponse)
 async def get_job(
         job_id: UUID,
@@ -320,6 +356,27 @@ async def get_job_artifacts(
     ]
 
 
+def slice_transcript(chunks: list[TranscriptionChunkResult], start_ms: int, end_ms: int) -> str:
+    """
+    Uses sub-segment timings where the transcription has them, falling back to whole chunks otherwise.
+    """
+    slice_texts = []
+    for chunk in chunks:
+        if chunk.start_time_ms > end_ms or chunk.end_time_ms < start_ms:
+            continue
+
+        if not chunk.segment_offsets_ms or not chunk.segment_texts:
+            slice_texts.append(chunk.text)
+            continue
+
+        offsets = chunk.segment_offsets_ms
+        for i, text in enumerate(chunk.segment_texts):
+            segment_end_ms = offsets[i + 1] if i + 1 < len(offsets) else chunk.end_time_ms
+            if offsets[i] <= end_ms and segment_end_ms >= start_ms:
+                slice_texts.append(text)
+
+    return " ".join(slice_texts)
+
 @app.post("/jobs/{job_id}/generate_post")
 async def generate_post_on_demand(
         job_id: UUID,
@@ -338,13 +395,7 @@ async def generate_post_on_demand(
 
     chunks = [TranscriptionChunkResult(**c) for c in transcription_artifact.content]
 
-    slice_texts = []
-    for chunk in chunks:
-        if (chunk.start_time_ms <= request.topic_end_ms
-                and chunk.end_time_ms >= request.topic_start_ms):
-            slice_texts.append(chunk.text)
-
-    transcript_slice = " ".join(slice_texts)
+    transcript_slice = slice_transcript(chunks, request.topic_start_ms, request.topic_end_ms)
     if not transcript_slice:
         raise HTTPException(status_code=400, detail="No transcript found in that time range")
 
@@ -384,6 +435,21 @@ async def handle_model_available(
         )
 
     session.add(model)
+
+    if body.chunk_length_ms is not None and body.chunking is not None:
+        chunking = session.get(TranscriptionModelChunking, body.model_name)
+        if chunking:
+            chunking.chunk_length_ms = body.chunk_length_ms
+            chunking.chunking = body.chunking
+            chunking.updated_at = datetime.now(timezone.utc)
+        else:
+            chunking = TranscriptionModelChunking(
+                model_name=body.model_name,
+                chunk_length_ms=body.chunk_length_ms,
+                chunking=body.chunking
+            )
+        session.add(chunking)
+
     session.commit()
     logger.info(f"Updated model availability for model {body.model_name}")
 
@@ -403,10 +469,25 @@ async def handle_transcription_result(
         logger.error(f"Job {job_id} not found in database")
         return
 
+    await complete_transcription(job, body.result, logger, session, body.chunk_length_ms, body.chunking)
+
+
+async def complete_transcription(
+        job: Job,
+        result: list[TranscriptionChunkResult],
+        logger: Logger,
+        session: Session,
+        chunk_length_ms: int | None = None,
+        chunking: str | None = None):
+    """
+    Stores the transcription artifact and hands the job over to the next stage.
+    If chunk_length_ms and chunking are given, the transcription becomes reusable by later jobs
+    for the same video whose worker cuts audio the same way.
+    """
     artifact = JobArtifact(
-        job_id = job_id,
+        job_id = job.id,
         type = "transcription",
-        content = [chunk.model_dump() for chunk in body.result]
+        content = [chunk.model_dump() for chunk in result]
     )
     session.add(artifact)
 
@@ -420,7 +501,21 @@ async def handle_transcription_result(
     session.refresh(artifact)
 
     logger.info(f"Added artifact {artifact.id}")
-    logger.info(f"Updated job {job_id} status to {job.status}")
+    logger.info(f"Updated job {job.id} status to {job.status}")
+
+    transcription_model = first_specified_model(
+        model_type="transcription",
+        action_models=job.action_models)
+
+    if chunk_length_ms is not None and chunking is not None and transcription_model is not None:
+        session.add(TranscriptionCacheEntry(
+            video_id=job.video_id,
+            transcription_model=transcription_model,
+            chunk_length_ms=chunk_length_ms,
+            chunking=chunking,
+            artifact_id=artifact.id
+        ))
+        session.commit()
 
     await publish_job_updated(job)
 
@@ -433,7 +528,7 @@ async def handle_transcription_result(
             request=SummaryRequest(
                 job_id=job.id,
                 video_id=job.video_id,
-                transcription=body.result
+                transcription=result
             )
 
             await broker.publish(request, queue=model)
@@ -447,7 +542,7 @@ async def handle_transcription_result(
             request = EntityRelationRequest(
                 job_id=job.id,
                 video_id=job.video_id,
-                transcription=body.result
+                transcription=result
             )
 
             await broker.publish(request, queue=model)
@@ -461,11 +556,11 @@ async def handle_transcription_result(
             request = TopicsRequest(
                 job_id=job.id,
                 video_id=job.video_id,
-                transcription=body.result
+                transcription=result
             )
 
             await broker.publish(request, queue=model)
-            base_logger.info(f"Published {model}, job_id: {job.id}")
+            logger.info(f"Published {model}, job_id: {job.id}")
 
         case "transcription":
             await broker.publish(JobCompleted(
@@ -13,4 +13,7 @@ class AppConfiguration:
     GRAPH_FAVOR_UMAP : bool = bool(os.getenv("GRAPH_FAVOR_UMAP")) == "True"
     GRAPH_PCA_MAX_DIMENSIONS : int = int(os.getenv("GRAPH_PCA_MAX_DIMENSIONS"))
     GRAPH_UMAP_NEIGHBOURS : int = int(os.getenv("GRAPH_UMAP_NEIGHBOURS"))
-    GRAPH_TSNE_PERPLEXITY : int = int(os.getenv("GRAPH_TSNE_PERPLEXITY"))
\ No newline at end of file
+    GRAPH_TSNE_PERPLEXITY : int = int(os.getenv("GRAPH_TSNE_PERPLEXITY"))
+    MODEL_IDLE_UNLOAD_SECONDS: int = int(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", "0"))
+    MODEL_MEMORY_BUDGET_MB: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+    MODEL_WARM_UP: bool = os.getenv("MODEL_WARM_UP", "True") == "True"
\ No newline at end of file
@@ -3,10 +3,12 @@ import logging
 from fastapi import FastAPI, Depends
 from fastapi_utils.tasks import repeat_every
 from faststream.rabbit.fastapi import RabbitRouter, Logger
+from prometheus_client import make_asgi_app
 from shared.api_helpers.decorators import fail_job_on_exception
 from .config import AppConfiguration
 from shared.models import *
 from shared.graph import *
+from shared.residency import *
 from .services.sentence_transformers_embedding_model import SentenceTransformersEmbeddingModel
 
 logging.basicConfig(level=logging.INFO)
@@ -20,11 +22,18 @@ broker = router.broker
 app = FastAPI()
 app.include_router(router)
 
+metrics_app = make_asgi_app()
+app.mount("/metrics", metrics_app)
+
 
 embedding_model: EmbeddingModel | None = None
 pca_service: PCAService | None = None
 tsne_service: TSNEService | None = None
 umap_service: UMAPService | None = None
+residency_manager: ModelResidencyManager | None = None
+# set once the model is warmed up, cleared when it is unloaded for being idle
+models_ready: asyncio.Event = asyncio.Event()
+warm_up_task: asyncio.Task | None = None
 
 def get_embedding_model() -> EmbeddingModel:
     global embedding_model
@@ -35,6 +44,16 @@ def get_embedding_model() -> EmbeddingModel:
         )
     return embedding_model
 
+def get_residency_manager() -> ModelResidencyManager:
+    global residency_manager
+    if residency_manager is None:
+        residency_manager = ModelResidencyManager(
+            idle_unload_seconds=AppConfiguration.MODEL_IDLE_UNLOAD_SECONDS,
+            memory_budget_bytes=AppConfiguration.MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+        )
+        residency_manager.register(embed_model_full_name, get_embedding_model())
+    return residency_manager
+
 def get_pca_service() -> PCAService:
     global pca_service
     if pca_service is None:
@@ -82,10 +101,44 @@ def get_graph_service(
 async def startup(app: FastAPI):
     await broker.start()
 
+    global warm_up_task
+    warm_up_task = asyncio.create_task(warm_up_models())
+
     await publish_available_models()
+    await unload_idle_models()
+
+async def warm_up_models():
+    if AppConfiguration.MODEL_WARM_UP:
+        try:
+            await get_residency_manager().warm_up(embed_model_full_name)
+        except Exception:
+            logging.exception("Model warm-up failed, the model will be loaded on the first request")
+
+    models_ready.set()
+    await announce_models()
+
+async def wait_for_models():
+    """
+    Waits until the model is warmed up, warming it up again if it was unloaded for being idle.
+    """
+    global warm_up_task
+    if not models_ready.is_set() and (warm_up_task is None or warm_up_task.done()):
+        warm_up_task = asyncio.create_task(warm_up_models())
+    await models_ready.wait()
+
+@repeat_every(seconds=10)
+async def unload_idle_models():
+    if await get_residency_manager().unload_idle():
+        models_ready.clear()
 
 @repeat_every(seconds=10)
 async def publish_available_models():
+    # withheld while warming up, so jobs aren't routed here while the model is still loading.
+    # A model unloaded for being idle is still announced, the next job warms it up again.
+    if warm_up_task is not None and warm_up_task.done():
+        await announce_models()
+
+async def announce_models():
     models = [ embed_model_full_name ]
 
     for model in models:
@@ -98,11 +151,14 @@ async def publish_available_models():
 async def graph_local(
         body : GraphRequest,
         logger: Logger,
+        residency: ModelResidencyManager = Depends(get_residency_manager),
         graph_service: GraphService = Depends(get_graph_service)
 ):
     logger.info(f"Handling graph request for {body.video_id}...")
+    await wait_for_models()
 
-    graph = await asyncio.to_thread(graph_service.generate_graph, body.entity_relations)
+    async with residency.use(embed_model_full_name):
+        graph = await asyncio.to_thread(graph_service.generate_graph, body.entity_relations)
     logger.info(f"Made a set of points for video {body.video_id}")
 
     result=graph.to_result()
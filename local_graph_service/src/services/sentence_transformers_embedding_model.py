@@ -35,6 +35,9 @@ class SentenceTransformersEmbeddingModel(EmbeddingModel):
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
 
+    def warm_up(self):
+        self.embed(["warm up"])
+
     def embed(self, entities: list[str]) -> ndarray:
         self.ensure_loaded()
         return self.__model.encode(entities)
\ No newline at end of file
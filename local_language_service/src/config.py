@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class AppConfiguration:
     __RMQ_USER: str = os.getenv("RABBITMQ_USER")
@@ -13,4 +14,28 @@ class AppConfiguration:
     LANGUAGE_MODEL : str = os.getenv("LOCAL_LANGUAGE_MODEL")
     OLLAMA_PORT : int = int(os.getenv("OLLAMA_PORT"))
     OLLAMA_HOST : str = os.getenv("OLLAMA_HOST")
-    LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS: int = int(os.getenv("LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS", "1000"))
\ No newline at end of file
+    OLLAMA_KEEP_ALIVE : str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_NUM_CTX : int = int(os.getenv("OLLAMA_NUM_CTX", "0"))
+    OLLAMA_NUM_PREDICT : int = int(os.getenv("OLLAMA_NUM_PREDICT", "0"))
+    OLLAMA_NUM_THREAD : int = int(os.getenv("OLLAMA_NUM_THREAD", "0"))
+    OLLAMA_NUM_PARALLEL : int = int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+    LANGUAGE_BATCH_WINDOW_MS : int = int(os.getenv("LANGUAGE_BATCH_WINDOW_MS", "20"))
+    LANGUAGE_MAX_QUEUED : int = int(os.getenv("LANGUAGE_MAX_QUEUED", "64"))
+    LANGUAGE_PREFETCH : int = int(os.getenv("LOCAL_LANGUAGE_PREFETCH", os.getenv("OLLAMA_NUM_PARALLEL", "1")))
+    LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS: int = int(os.getenv("LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS", "1000"))
+    LANGUAGE_MAX_CONCURRENCY: int = int(os.getenv("LOCAL_LANGUAGE_MAX_CONCURRENCY", "1"))
+    LANGUAGE_OVERALL_SUMMARY_TOKEN_BUDGET: int = int(os.getenv("LOCAL_LANGUAGE_OVERALL_SUMMARY_TOKEN_BUDGET", "0"))
+    LANGUAGE_OVERALL_SUMMARY_FAN_IN: int = int(os.getenv("LANGUAGE_OVERALL_SUMMARY_FAN_IN", "8"))
+    LANGUAGE_COMPACT_ENTITY_CONTEXT: bool = os.getenv("LANGUAGE_COMPACT_ENTITY_CONTEXT") == "True"
+    LANGUAGE_ENTITY_CONTEXT_LIMIT: int = int(os.getenv("LANGUAGE_ENTITY_CONTEXT_LIMIT", "200"))
+    LANGUAGE_PARALLEL_ENTITY_EXTRACTION: bool = os.getenv("LANGUAGE_PARALLEL_ENTITY_EXTRACTION") == "True"
+    LANGUAGE_ENTITY_MERGE_EMBEDDINGS: bool = os.getenv("LANGUAGE_ENTITY_MERGE_EMBEDDINGS") == "True"
+    LANGUAGE_ENTITY_MERGE_EMBED_MODEL: str = os.getenv("LOCAL_LANGUAGE_ENTITY_MERGE_EMBED_MODEL", "nomic-embed-text")
+    LANGUAGE_ENTITY_MERGE_SIMILARITY: float = float(os.getenv("LANGUAGE_ENTITY_MERGE_SIMILARITY", "0.9"))
+    LANGUAGE_TOPIC_WINDOW_TOKENS: int = int(os.getenv("LOCAL_LANGUAGE_TOPIC_WINDOW_TOKENS", "0"))
+    LANGUAGE_TOPIC_WINDOW_OVERLAP_TOKENS: int = int(os.getenv("LANGUAGE_TOPIC_WINDOW_OVERLAP_TOKENS", "0"))
+    LANGUAGE_STREAM_JSON: bool = os.getenv("LANGUAGE_STREAM_JSON") == "True"
+    LANGUAGE_CACHE_ENABLED: bool = os.getenv("LANGUAGE_CACHE_ENABLED") == "True"
+    LANGUAGE_CACHE_PATH: str = os.getenv("LANGUAGE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "nvideo-language-cache.sqlite3"))
+    LANGUAGE_CACHE_TTL_SECONDS: int = int(os.getenv("LANGUAGE_CACHE_TTL_SECONDS", "604800"))
+    LANGUAGE_CACHE_MAX_ENTRIES: int = int(os.getenv("LANGUAGE_CACHE_MAX_ENTRIES", "10000"))
\ No newline at end of file
@@ -1,6 +1,8 @@
-﻿from fastapi import FastAPI, Depends
+﻿import asyncio
+from fastapi import FastAPI, Depends
 from fastapi_utils.tasks import repeat_every
 from faststream.rabbit.fastapi import RabbitRouter, Logger
+from prometheus_client import make_asgi_app
 from ollama import AsyncClient
 from shared.language import *
 from shared.models import SummaryResult
@@ -16,12 +18,21 @@ summary_model_name = f"summary.local-{language_model_name}"
 entity_relation_model_name = f"entity-relation.local-{language_model_name}"
 
 
-router = RabbitRouter(AppConfiguration.AMQP_URL, fail_fast=False)
+# several jobs have to be in flight at once for their chat calls to be batched together
+router = RabbitRouter(AppConfiguration.AMQP_URL, fail_fast=False, max_consumers=AppConfiguration.LANGUAGE_PREFETCH)
 broker = router.broker
 app = FastAPI()
 app.include_router(router)
 
+metrics_app = make_asgi_app()
+app.mount("/metrics", metrics_app)
+
 ollama_client : AsyncClient | None = None
+ollama_model : OllamaLanguageModel | None = None
+batching_model : BatchingLanguageModel | None = None
+# Ollama queues requests beyond its OLLAMA_NUM_PARALLEL, so there is no point in sending more
+concurrency_limiter = asyncio.Semaphore(AppConfiguration.LANGUAGE_MAX_CONCURRENCY)
+response_cache: LanguageResponseCache | None = None
 
 def get_ollama_client():
     global ollama_client
@@ -37,14 +48,77 @@ def get_ollama_client():
     )
     return ollama_client
 
+def get_response_cache() -> LanguageResponseCache:
+    global response_cache
+    if response_cache is None:
+        response_cache = LanguageResponseCache(
+            path=AppConfiguration.LANGUAGE_CACHE_PATH,
+            ttl_seconds=AppConfiguration.LANGUAGE_CACHE_TTL_SECONDS,
+            max_entries=AppConfiguration.LANGUAGE_CACHE_MAX_ENTRIES
+        )
+    return response_cache
+
+def get_keep_alive() -> float | str:
+    # Ollama takes either a duration like "30m" or a number of seconds, where -1 means forever
+    keep_alive = AppConfiguration.OLLAMA_KEEP_ALIVE
+    try:
+        return float(keep_alive)
+    except ValueError:
+        return keep_alive
+
+def get_ollama_language_model(client: AsyncClient) -> OllamaLanguageModel:
+    global ollama_model
+    if ollama_model is None:
+        ollama_model = OllamaLanguageModel(
+            language_model,
+            client,
+            keep_alive=get_keep_alive(),
+            num_ctx=AppConfiguration.OLLAMA_NUM_CTX,
+            num_predict=AppConfiguration.OLLAMA_NUM_PREDICT,
+            num_thread=AppConfiguration.OLLAMA_NUM_THREAD
+        )
+    return ollama_model
+
+def get_batching_model(client: AsyncClient) -> BatchingLanguageModel:
+    global batching_model
+    if batching_model is None:
+        batching_model = BatchingLanguageModel(
+            get_ollama_language_model(client),
+            max_parallel=AppConfiguration.OLLAMA_NUM_PARALLEL,
+            max_queued=AppConfiguration.LANGUAGE_MAX_QUEUED,
+            batch_window_ms=AppConfiguration.LANGUAGE_BATCH_WINDOW_MS
+        )
+    return batching_model
+
 def get_ollama_model(
         client = Depends(get_ollama_client)
-):
-    return OllamaLanguageModel(language_model, client)
+) -> LanguageModel:
+    model = get_batching_model(client)
+    if not AppConfiguration.LANGUAGE_CACHE_ENABLED:
+        return model
+
+    return CachedLanguageModel(
+        model=model,
+        model_name=f"ollama-{language_model}",
+        cache=get_response_cache()
+    )
+
+def get_entity_merger(
+        client = Depends(get_ollama_client)
+) -> EntityMerger:
+    if not AppConfiguration.LANGUAGE_ENTITY_MERGE_EMBEDDINGS:
+        return EntityMerger()
+
+    async def embed(names: list[str]) -> list[list[float]]:
+        response = await client.embed(model=AppConfiguration.LANGUAGE_ENTITY_MERGE_EMBED_MODEL, input=names)
+        return response.embeddings
+
+    return EntityMerger(embed=embed, similarity_threshold=AppConfiguration.LANGUAGE_ENTITY_MERGE_SIMILARITY)
 
 def get_language_service(
         logger: Logger,
-        model = Depends(get_ollama_model)
+        model = Depends(get_ollama_model),
+        entity_merger: EntityMerger = Depends(get_entity_merger)
 ):
     return LanguageService(
         logger=logger,
@@ -52,7 +126,17 @@ def get_language_service(
         summary_system_prompt=AppConfiguration.LANGUAGE_SUMMARY_SYSTEM_PROMPT,
         overall_summary_system_prompt=AppConfiguration.LANGUAGE_OVERALL_SUMMARY_SYSTEM_PROMPT,
         entity_system_prompt=AppConfiguration.LANGUAGE_ENTITY_SYSTEM_PROMPT,
-        empty_chunk_threshold_ms=AppConfiguration.LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS
+        empty_chunk_threshold_ms=AppConfiguration.LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS,
+        concurrency_limiter=concurrency_limiter,
+        overall_summary_token_budget=AppConfiguration.LANGUAGE_OVERALL_SUMMARY_TOKEN_BUDGET,
+        overall_summary_fan_in=AppConfiguration.LANGUAGE_OVERALL_SUMMARY_FAN_IN,
+        compact_entity_context=AppConfiguration.LANGUAGE_COMPACT_ENTITY_CONTEXT,
+        entity_context_limit=AppConfiguration.LANGUAGE_ENTITY_CONTEXT_LIMIT,
+        parallel_entity_extraction=AppConfiguration.LANGUAGE_PARALLEL_ENTITY_EXTRACTION,
+        entity_merger=entity_merger,
+        topic_window_tokens=AppConfiguration.LANGUAGE_TOPIC_WINDOW_TOKENS,
+        topic_window_overlap_tokens=AppConfiguration.LANGUAGE_TOPIC_WINDOW_OVERLAP_TOKENS,
+        stream_json=AppConfiguration.LANGUAGE_STREAM_JSON
     )
 
 async def pull_model(client: AsyncClient, model: str):
@@ -70,6 +154,11 @@ async def startup(app: FastAPI):
 
     client = get_ollama_client()
     await pull_model(client, language_model)
+    if AppConfiguration.LANGUAGE_ENTITY_MERGE_EMBEDDINGS:
+        await pull_model(client, AppConfiguration.LANGUAGE_ENTITY_MERGE_EMBED_MODEL)
+
+    # load the weights now instead of on the first job, keep_alive then keeps them loaded between jobs
+    await get_ollama_language_model(client).pin()
 
 @repeat_every(seconds=10)
 async def publish_available_models():
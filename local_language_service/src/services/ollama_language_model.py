@@ -1,3 +1,4 @@
+from typing import AsyncIterator
 from ollama import AsyncClient, ChatResponse
 from pydantic import BaseModel
 from shared.language.language_model import LanguageModel, TextMessage, FileMessage
@@ -7,10 +8,35 @@ class OllamaLanguageModel(LanguageModel):
     def __init__(
             self,
             model_name: str,
-            client: AsyncClient
+            client: AsyncClient,
+            keep_alive: float | str | None = None,
+            num_ctx: int = 0,
+            num_predict: int = 0,
+            num_thread: int = 0
     ):
+        """
+        :param keep_alive: how long Ollama keeps the model loaded after a request, e.g. "30m", or -1 for forever.
+        :param num_ctx: context length, num_predict: maximum number of generated tokens,
+        num_thread: CPU threads. Zero leaves the server's default.
+        """
         self.__model_name = model_name
         self.__client = client
+        self.__keep_alive = keep_alive
+        self.__options = {
+            name: value
+            for name, value in (("num_ctx", num_ctx), ("num_predict", num_predict), ("num_thread", num_thread))
+            if value
+        }
+
+    async def pin(self):
+        """
+        Loads the model into memory without generating anything, it then stays there for keep_alive.
+        """
+        await self.__client.generate(
+            model=self.__model_name,
+            keep_alive=self.__keep_alive,
+            options=self.__options or None
+        )
 
     async def chat(
             self,
@@ -18,6 +44,51 @@ class OllamaLanguageModel(LanguageModel):
             system_prompt: str | None = None,
             schema: type[BaseModel] | None = None
     ) -> str:
+        contents = self.__create_contents(messages, system_prompt)
+
+        response: ChatResponse = await self.__client.chat(
+            model=self.__model_name,
+            messages=contents,
+            format=schema.model_json_schema() if schema else None,
+            stream=False,
+            keep_alive=self.__keep_alive,
+            options=self.__options or None
+        )
+
+        return response.message.content
+
+    async def chat_stream(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None = None,
+            schema: type[BaseModel] | None = None
+    ) -> AsyncIterator[str]:
+        contents = self.__create_contents(messages, system_prompt)
+
+        response: AsyncIterator[ChatResponse] = await self.__client.chat(
+            model=self.__model_name,
+            messages=contents,
+            format=schema.model_json_schema() if schema else None,
+            stream=True,
+            keep_alive=self.__keep_alive,
+            options=self.__options or None
+        )
+
+        try:
+            async for part in response:
+                if part.message.content:
+                    yield part.message.content
+        finally:
+            # closes the HTTP response, which makes Ollama stop generating
+            await response.aclose()
+
+    def __create_contents(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None
+    ) -> list[dict]:
+        # the system prompt always comes first and callers put the most stable messages before the changing ones,
+        # so consecutive calls share a prefix and Ollama can reuse its KV cache for it
         contents = []
 
         if system_prompt:
@@ -35,11 +106,4 @@ class OllamaLanguageModel(LanguageModel):
                 contents.append({"role": "user", "content": file_content})
                 continue
 
-        response: ChatResponse = await self.__client.chat(
-            model=self.__model_name,
-            messages=contents,
-            format=schema.model_json_schema() if schema else None,
-            stream=False,
-        )
-
-        return response.message.content
\ No newline at end of file
+        return contents
\ No newline at end of file
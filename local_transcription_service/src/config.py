@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class AppConfiguration:
     __RMQ_USER: str = os.getenv("RABBITMQ_USER")
@@ -10,4 +11,15 @@ class AppConfiguration:
     TRANSCRIPTION_MODEL: str = os.getenv("TRANSCRIPTION_MODEL")
     TRANSCRIPTION_MODEL_DIR: str = os.getenv("TRANSCRIPTION_MODEL_DIR")
     TRANSCRIPTION_CHUNK_SECONDS: int = int(os.getenv("TRANSCRIPTION_CHUNK_SECONDS"))
-    TRANSCRIPTION_LIBRARY: str = os.getenv("TRANSCRIPTION_LIBRARY")
\ No newline at end of file
+    TRANSCRIPTION_SPLIT_ON_SILENCE: bool = os.getenv("TRANSCRIPTION_SPLIT_ON_SILENCE") == "True"
+    TRANSCRIPTION_SILENCE_NOISE_DB: float = float(os.getenv("TRANSCRIPTION_SILENCE_NOISE_DB", "-35"))
+    TRANSCRIPTION_SILENCE_MIN_MS: int = int(os.getenv("TRANSCRIPTION_SILENCE_MIN_MS", "500"))
+    AUDIO_CACHE_DIR: str = os.getenv("AUDIO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "nvideo-audio-cache"))
+    AUDIO_CACHE_MAX_MB: int = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+    TRANSCRIPTION_LIBRARY: str = os.getenv("TRANSCRIPTION_LIBRARY")
+    MODEL_IDLE_UNLOAD_SECONDS: int = int(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", "0"))
+    MODEL_MEMORY_BUDGET_MB: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+    MODEL_WARM_UP: bool = os.getenv("MODEL_WARM_UP", "True") == "True"
+    TRANSCRIPTION_BATCH_SIZE: int = int(os.getenv("TRANSCRIPTION_BATCH_SIZE", "1"))
+    TRANSCRIPTION_PIPELINE_CHUNK_LENGTH_S: float = float(os.getenv("TRANSCRIPTION_PIPELINE_CHUNK_LENGTH_S", "0"))
+    TRANSCRIPTION_DECODE_IN_MEMORY: bool = os.getenv("TRANSCRIPTION_DECODE_IN_MEMORY") == "True"
\ No newline at end of file
@@ -1,12 +1,17 @@
 ﻿import asyncio
-import os
+import functools
+import logging
 from fastapi import FastAPI, Depends
 from fastapi_utils.tasks import repeat_every
 from faststream.rabbit.fastapi import RabbitRouter, Logger
+from prometheus_client import make_asgi_app
 from shared.audio import *
+from shared.audio import split_audio, split_audio_on_silence
 from shared.transcription import *
-from shared.transcription.utils import convert_to_chunk_results
+from shared.transcription.utils import convert_to_chunk_results, describe_chunking
+from shared.transcription.pcm_transcription_service import PcmTranscriptionService
 from shared.models import *
+from shared.residency import *
 from .services.transformer_transcription_model import TransformerTranscriptionModel
 from .services.faster_whisper_transcription_model import FasterWhisperTranscriptionModel
 from shared.api_helpers.decorators import fail_job_on_exception
@@ -22,13 +27,25 @@ broker = router.broker
 app = FastAPI()
 app.include_router(router)
 
+metrics_app = make_asgi_app()
+app.mount("/metrics", metrics_app)
+
 transformer_model : TransformerTranscriptionModel | None = None
 faster_whisper_model : FasterWhisperTranscriptionModel | None = None
+audio_cache : AudioCache | None = None
+residency_manager : ModelResidencyManager | None = None
+# set once the model is warmed up, cleared when it is unloaded for being idle
+models_ready : asyncio.Event = asyncio.Event()
+warm_up_task : asyncio.Task | None = None
 
 def get_transformer_model() -> TransformerTranscriptionModel:
     global transformer_model
     if transformer_model is None:
-        transformer_model = TransformerTranscriptionModel(transcription_model)
+        transformer_model = TransformerTranscriptionModel(
+            transcription_model,
+            batch_size=AppConfiguration.TRANSCRIPTION_BATCH_SIZE,
+            chunk_length_s=AppConfiguration.TRANSCRIPTION_PIPELINE_CHUNK_LENGTH_S
+        )
     return transformer_model
 
 def get_faster_whisper_model() -> FasterWhisperTranscriptionModel:
@@ -37,32 +54,118 @@ def get_faster_whisper_model() -> FasterWhisperTranscriptionModel:
         faster_whisper_model = FasterWhisperTranscriptionModel(transcription_model)
     return faster_whisper_model
 
-def get_transcription_service():
-    model: TranscriptionModel
+def get_transcription_model() -> TranscriptionModel:
     match AppConfiguration.TRANSCRIPTION_LIBRARY:
         case "transformers":
-            model = get_transformer_model()
+            return get_transformer_model()
         case "faster_whisper":
-            model = get_faster_whisper_model()
+            return get_faster_whisper_model()
         case _:
-            model = get_transformer_model()
+            return get_transformer_model()
+
+def get_residency_manager() -> ModelResidencyManager:
+    global residency_manager
+    if residency_manager is None:
+        residency_manager = ModelResidencyManager(
+            idle_unload_seconds=AppConfiguration.MODEL_IDLE_UNLOAD_SECONDS,
+            memory_budget_bytes=AppConfiguration.MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+        )
+        residency_manager.register(transcription_model_full_name, get_transcription_model())
+    return residency_manager
+
+def get_transcription_service() -> TranscriptionService | PcmTranscriptionService:
+    model = get_transcription_model()
+
+    batch_size = AppConfiguration.TRANSCRIPTION_BATCH_SIZE
+
+    if AppConfiguration.TRANSCRIPTION_DECODE_IN_MEMORY:
+        return PcmTranscriptionService(
+            model,
+            batch_size=batch_size,
+            split_on_silence=AppConfiguration.TRANSCRIPTION_SPLIT_ON_SILENCE,
+            silence_noise_db=AppConfiguration.TRANSCRIPTION_SILENCE_NOISE_DB,
+            min_silence_ms=AppConfiguration.TRANSCRIPTION_SILENCE_MIN_MS
+        )
+
+    return TranscriptionService(model, batch_size=batch_size, splitter=get_splitter())
+
+def get_splitter():
+    if not AppConfiguration.TRANSCRIPTION_SPLIT_ON_SILENCE:
+        return split_audio
+
+    return functools.partial(
+        split_audio_on_silence,
+        noise_db=AppConfiguration.TRANSCRIPTION_SILENCE_NOISE_DB,
+        min_silence_ms=AppConfiguration.TRANSCRIPTION_SILENCE_MIN_MS
+    )
 
-    return TranscriptionService(model)
+def get_chunking() -> str:
+    return describe_chunking(
+        AppConfiguration.TRANSCRIPTION_SPLIT_ON_SILENCE,
+        silence_noise_db=AppConfiguration.TRANSCRIPTION_SILENCE_NOISE_DB,
+        min_silence_ms=AppConfiguration.TRANSCRIPTION_SILENCE_MIN_MS
+    )
 
 def get_download_service():
     return DownloadService()
 
+def get_audio_cache() -> AudioCache:
+    global audio_cache
+    if audio_cache is None:
+        audio_cache = AudioCache(
+            download=get_download_service(),
+            cache_dir=AppConfiguration.AUDIO_CACHE_DIR,
+            max_size_bytes=AppConfiguration.AUDIO_CACHE_MAX_MB * 1024 * 1024
+        )
+    return audio_cache
+
 @router.after_startup
 async def startup(app: FastAPI):
     await broker.connect()
     await broker.start()
 
+    global warm_up_task
+    warm_up_task = asyncio.create_task(warm_up_models())
+
     await publish_available_models()
+    await unload_idle_models()
+
+async def warm_up_models():
+    if AppConfiguration.MODEL_WARM_UP:
+        try:
+            await get_residency_manager().warm_up(transcription_model_full_name)
+        except Exception:
+            logging.exception("Model warm-up failed, the model will be loaded on the first request")
+
+    models_ready.set()
+    await announce_models()
+
+async def wait_for_models():
+    """
+    Waits until the model is warmed up, warming it up again if it was unloaded for being idle.
+    """
+    global warm_up_task
+    if not models_ready.is_set() and (warm_up_task is None or warm_up_task.done()):
+        warm_up_task = asyncio.create_task(warm_up_models())
+    await models_ready.wait()
+
+@repeat_every(seconds=10)
+async def unload_idle_models():
+    if await get_residency_manager().unload_idle():
+        models_ready.clear()
 
 @repeat_every(seconds=10)
 async def publish_available_models():
+    # withheld while warming up, so jobs aren't routed here while the model is still loading.
+    # A model unloaded for being idle is still announced, the next job warms it up again.
+    if warm_up_task is not None and warm_up_task.done():
+        await announce_models()
+
+async def announce_models():
     await broker.publish(ModelAvailable(
-        model_name=transcription_model_full_name
+        model_name=transcription_model_full_name,
+        chunk_length_ms=AppConfiguration.TRANSCRIPTION_CHUNK_SECONDS * 1000,
+        chunking=get_chunking()
     ), queue="model.available")
 
 @router.subscriber(transcription_model_full_name)
@@ -70,28 +173,29 @@ async def publish_available_models():
 async def transcribe_local_whisper(
         body: TranscriptionRequest,
         logger: Logger,
-        download: DownloadService = Depends(get_download_service),
-        transcription: TranscriptionService = Depends(get_transcription_service)
+        cache: AudioCache = Depends(get_audio_cache),
+        residency: ModelResidencyManager = Depends(get_residency_manager),
+        transcription: TranscriptionService | PcmTranscriptionService = Depends(get_transcription_service)
 ):
     logger.info(f"Handling transcription request for {body.video_id}...")
-
-    path = await asyncio.to_thread(download.download_video_by_id, body.video_id)
-    logger.info(f"Downloaded {body.video_id} to {path}")
+    await wait_for_models()
 
     segment_length_ms = AppConfiguration.TRANSCRIPTION_CHUNK_SECONDS * 1000
 
     chunks = list()
-    async for chunk in transcription.transcribe(path, segment_length_ms):
-        chunks.append(chunk)
-        logger.info(f"Transcribed chunk at {chunk.start_time_ms} of {body.video_id}")
+    async with cache.acquire(body.video_id) as path, residency.use(transcription_model_full_name):
+        logger.info(f"Audio for {body.video_id} is at {path}")
+
+        async for chunk in transcription.transcribe(path, segment_length_ms):
+            chunks.append(chunk)
+            logger.info(f"Transcribed chunk at {chunk.start_time_ms} of {body.video_id}")
     logger.info(f"Transcribed video {body.video_id}")
 
     response=TranscriptionResponse(
         job_id = body.job_id,
-        result = convert_to_chunk_results(chunks)
+        result = convert_to_chunk_results(chunks),
+        chunk_length_ms = segment_length_ms,
+        chunking = get_chunking()
     )
 
-    await broker.publish(response, queue="transcription.result")
-
-    if os.path.exists(path):
-        os.remove(path)
\ No newline at end of file
+    await broker.publish(response, queue="transcription.result")
\ No newline at end of file
@@ -1,12 +1,16 @@
 import asyncio
 import gc
+import numpy as np
 import torch
 from faster_whisper import WhisperModel
+from numpy import ndarray
 from shared.transcription import *
+from shared.transcription.pcm_transcription_model import PcmTranscriptionModel
+from shared.audio.pcm import WHISPER_SAMPLE_RATE
 from ..config import *
 
 
-class FasterWhisperTranscriptionModel(TranscriptionModel):
+class FasterWhisperTranscriptionModel(TranscriptionModel, PcmTranscriptionModel):
     def __init__(self, model_name: str):
         self.model_name : str = model_name
         self.model : WhisperModel | None = None
@@ -43,18 +47,32 @@ class FasterWhisperTranscriptionModel(TranscriptionModel):
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
 
+    def warm_up(self):
+        # a second of silence is enough to allocate buffers and run the encoder and decoder once
+        self.__transcribe(np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32))
 
     async def transcribe(self, file_path):
         return await asyncio.to_thread(self.__transcribe, file_path)
 
+    async def transcribe_pcm(self, samples: ndarray, sample_rate: int):
+        # faster-whisper expects raw audio at the model's own sample rate (16 kHz) and does not resample it
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            raise ValueError(f"faster-whisper needs {WHISPER_SAMPLE_RATE} Hz audio, got {sample_rate} Hz")
+        return await asyncio.to_thread(self.__transcribe, samples)
 
-    def __transcribe(self, file_path):
+
+    def __transcribe(self, audio: str | ndarray):
         self.ensure_loaded()
 
         segments, info = self.model.transcribe(
-            audio=file_path
+            audio=audio
         )
+        segments = list(segments)
 
-        result = " ".join(segment.text for segment in segments)
+        result = TimedTranscription(
+            text=" ".join(segment.text for segment in segments),
+            segment_offsets_ms=[int(segment.start * 1000) for segment in segments],
+            segment_texts=[segment.text.strip() for segment in segments]
+        )
 
         return result
\ No newline at end of file
@@ -1,14 +1,28 @@
 import asyncio
 import gc
+import numpy as np
 import torch
 from transformers import AutoProcessor, AutoModelForSpeechSeq2Seq, pipeline, AutomaticSpeechRecognitionPipeline
+from numpy import ndarray
 from shared.transcription import *
+from shared.transcription.pcm_transcription_model import PcmTranscriptionModel
+from shared.audio.pcm import WHISPER_SAMPLE_RATE
 from ..config import *
 
 
-class TransformerTranscriptionModel(TranscriptionModel):
-    def __init__(self, model_name: str):
+class TransformerTranscriptionModel(TranscriptionModel, PcmTranscriptionModel):
+    def __init__(
+            self,
+            model_name: str,
+            batch_size: int = 1,
+            chunk_length_s: float | None = None):
+        """
+        :param batch_size: how many inputs (or 30 second windows, with chunk_length_s) go through the model at once.
+        :param chunk_length_s: enables the pipeline's chunked long-form inference, which lets a single file be batched too.
+        """
         self.model_name : str = model_name
+        self.batch_size = max(1, batch_size)
+        self.chunk_length_s = chunk_length_s or None
         self.pipe : AutomaticSpeechRecognitionPipeline | None = None
         self.model = None
 
@@ -45,7 +59,9 @@ class TransformerTranscriptionModel(TranscriptionModel):
                 max_new_tokens=128,
                 torch_dtype=torch_dtype,
                 device=device,
-                return_timestamps=True
+                return_timestamps=True,
+                batch_size=self.batch_size,
+                chunk_length_s=self.chunk_length_s
             )
 
     def unload(self):
@@ -57,16 +73,59 @@ class TransformerTranscriptionModel(TranscriptionModel):
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
 
+    def warm_up(self):
+        # a second of silence is enough to allocate buffers and run the encoder and decoder once
+        self.__transcribe({"raw": np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32), "sampling_rate": WHISPER_SAMPLE_RATE})
 
 
     async def transcribe(self, file_path):
         return await asyncio.to_thread(self.__transcribe, file_path)
 
-    def __transcribe(self, file_path):
+    async def transcribe_pcm(self, samples: ndarray, sample_rate: int):
+        return await asyncio.to_thread(self.__transcribe, {"raw": samples, "sampling_rate": sample_rate})
+
+    async def transcribe_many(self, file_paths: list[str]) -> list[TimedTranscription]:
+        return await asyncio.to_thread(self.__transcribe_many, file_paths)
+
+    async def transcribe_pcm_many(self, samples: list[ndarray], sample_rate: int) -> list[TimedTranscription]:
+        return await asyncio.to_thread(self.__transcribe_many, [
+            {"raw": chunk_samples, "sampling_rate": sample_rate}
+            for chunk_samples in samples
+        ])
+
+    def __transcribe(self, audio: str | dict):
         self.ensure_loaded()
 
-        result = self.pipe(file_path)
+        result = self.pipe(audio)
 
-        transcription = result["text"]
+        transcription = self.__to_timed_transcription(result)
+
+        return transcription
+
+    def __transcribe_many(self, audio: list[str] | list[dict]) -> list[TimedTranscription]:
+        self.ensure_loaded()
 
-        return transcription
\ No newline at end of file
+        results = self.pipe(audio, batch_size=self.batch_size)
+
+        return [self.__to_timed_transcription(result) for result in results]
+
+    def __to_timed_transcription(self, result: dict) -> TimedTranscription:
+        # with return_timestamps=True, "chunks" holds {"timestamp": (start_s, end_s), "text": ...} per segment
+        chunks = result.get("chunks") or []
+
+        # the pipeline leaves a start or end it could not predict as None,
+        # a missing start falls back to where the previous segment ended, or started
+        offsets_ms = []
+        previous_start_s, previous_end_s = 0, None
+        for chunk in chunks:
+            start_s, end_s = chunk["timestamp"]
+            if start_s is None:
+                start_s = previous_end_s if previous_end_s is not None else previous_start_s
+            offsets_ms.append(int(start_s * 1000))
+            previous_start_s, previous_end_s = start_s, end_s
+
+        return TimedTranscription(
+            text=result["text"],
+            segment_offsets_ms=offsets_ms,
+            segment_texts=[chunk["text"].strip() for chunk in chunks]
+        )
\ No newline at end of file
@@ -10,6 +10,14 @@ class AppConfiguration:
     GRAPH_EMBED_PROVIDER : str = os.getenv("REMOTE_GRAPH_EMBED_PROVIDER")
     GRAPH_EMBED_MODEL : str = os.getenv("REMOTE_GRAPH_EMBED_MODEL")
     GRAPH_EMBED_API_KEY : str = os.getenv("REMOTE_GRAPH_EMBED_API_KEY")
+    GRAPH_EMBED_RATE_LIMIT_RPS : float = float(os.getenv("REMOTE_GRAPH_EMBED_RATE_LIMIT_RPS", "1"))
+    RATE_LIMIT_MIN_RPS : float = float(os.getenv("RATE_LIMIT_MIN_RPS", "0.05"))
+    RATE_LIMIT_MAX_RATE_FACTOR : float = float(os.getenv("RATE_LIMIT_MAX_RATE_FACTOR", "4"))
+    RATE_LIMIT_MAX_RETRIES : int = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "10"))
+    RATE_LIMIT_MAX_BACKOFF_SECONDS : float = float(os.getenv("RATE_LIMIT_MAX_BACKOFF_SECONDS", "60"))
+    HTTP_MAX_CONNECTIONS : int = int(os.getenv("REMOTE_HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS : int = int(os.getenv("REMOTE_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP2 : bool = os.getenv("REMOTE_HTTP2", "True") == "True"
     GRAPH_REDUCE_WITH_API : bool = os.getenv("REMOTE_GRAPH_REDUCE_WITH_API") == "True"
     GRAPH_USE_PCA : bool = os.getenv("GRAPH_USE_PCA") == "True"
     GRAPH_FAVOR_UMAP : bool = bool(os.getenv("GRAPH_FAVOR_UMAP")) == "True"
@@ -3,11 +3,14 @@ from fastapi import FastAPI, Depends
 from fastapi_utils.tasks import repeat_every
 from faststream.rabbit.fastapi import RabbitRouter, Logger
 from google import genai
+from prometheus_client import make_asgi_app
 
 from .config import AppConfiguration
 from shared.models import *
 from shared.graph import *
+from shared.api_helpers.clients import ClientRegistry
 from shared.api_helpers.decorators import fail_job_on_exception
+from shared.api_helpers.rate_limiter import get_rate_limiter
 from .services.gemini_embedding_model import GeminiEmbeddingModel
 
 embed_model = AppConfiguration.GRAPH_EMBED_MODEL
@@ -19,26 +22,37 @@ broker = router.broker
 app = FastAPI()
 app.include_router(router)
 
+metrics_app = make_asgi_app()
+app.mount("/metrics", metrics_app)
+
 
 embedding_model: EmbeddingModel | None = None
 pca_service: PCAService | None = None
 tsne_service: TSNEService | None = None
 umap_service: UMAPService | None = None
-gemini_client : genai.Client | None = None
+client_registry = ClientRegistry(
+    max_connections=AppConfiguration.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=AppConfiguration.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    http2=AppConfiguration.HTTP2
+)
 
 def get_gemini_client() -> genai.Client:
-    global gemini_client
-
-    if gemini_client is not None:
-        return gemini_client
-
-    return genai.Client(api_key=AppConfiguration.GRAPH_EMBED_API_KEY)
+    return client_registry.gemini(AppConfiguration.GRAPH_EMBED_API_KEY)
 
 def get_embedding_service() -> EmbeddingModel:
     global embedding_model
     if embedding_model is None:
         client = get_gemini_client()
-        embedding_model = GeminiEmbeddingModel(client, embed_model)
+        rate_limiter = get_rate_limiter(
+            AppConfiguration.GRAPH_EMBED_PROVIDER,
+            embed_model,
+            initial_rate=AppConfiguration.GRAPH_EMBED_RATE_LIMIT_RPS,
+            max_rate=AppConfiguration.GRAPH_EMBED_RATE_LIMIT_RPS * AppConfiguration.RATE_LIMIT_MAX_RATE_FACTOR,
+            min_rate=AppConfiguration.RATE_LIMIT_MIN_RPS,
+            max_retries=AppConfiguration.RATE_LIMIT_MAX_RETRIES,
+            max_backoff_seconds=AppConfiguration.RATE_LIMIT_MAX_BACKOFF_SECONDS
+        )
+        embedding_model = GeminiEmbeddingModel(client, embed_model, rate_limiter)
     return embedding_model
 
 def get_pca_service() -> PCAService:
@@ -90,6 +104,10 @@ async def startup(app: FastAPI):
 
     await publish_available_models()
 
+@router.on_broker_shutdown
+async def shutdown():
+    await client_registry.close()
+
 @repeat_every(seconds=10)
 async def publish_available_models():
     models = [ embed_model_full_name ]
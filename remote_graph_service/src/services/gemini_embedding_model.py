@@ -2,6 +2,7 @@ import numpy as np
 from google import genai
 from google.genai.types import EmbedContentConfig
 from numpy import ndarray
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter
 from shared.graph.embedding_model import EmbeddingModel
 from ..config import AppConfiguration
 
@@ -9,10 +10,12 @@ class GeminiEmbeddingModel(EmbeddingModel):
     def __init__(
             self,
             client: genai.Client,
-            model_name: str
+            model_name: str,
+            rate_limiter: AdaptiveRateLimiter
     ):
         self.__client = client
         self.__model_name = model_name
+        self.__rate_limiter = rate_limiter
 
     def ensure_loaded(self):
         pass
@@ -21,12 +24,13 @@ class GeminiEmbeddingModel(EmbeddingModel):
         pass
 
     def embed(self, entities: list[str]) -> ndarray:
-        result = self.__client.models.embed_content(
+        # runs in a worker thread of the graph service
+        result = self.__rate_limiter.call_sync(lambda: self.__client.models.embed_content(
             model=self.__model_name,
             contents=entities,
             config=EmbedContentConfig(
                 output_dimensionality=2
             ) if AppConfiguration.GRAPH_REDUCE_WITH_API else None
-        )
+        ))
 
         return np.array([embed.values for embed in result.embeddings])
\ No newline at end of file
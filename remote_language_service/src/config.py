@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class AppConfiguration:
     __RMQ_USER: str = os.getenv("RABBITMQ_USER")
@@ -13,6 +14,30 @@ class AppConfiguration:
     LANGUAGE_MODEL_PROVIDER_API_KEY : str = os.getenv("REMOTE_LANGUAGE_MODEL_PROVIDER_API_KEY")
     LANGUAGE_MODEL : str = os.getenv("REMOTE_LANGUAGE_MODEL")
     LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS: int = int(os.getenv("LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS", "1000"))
+    LANGUAGE_MAX_CONCURRENCY: int = int(os.getenv("REMOTE_LANGUAGE_MAX_CONCURRENCY", "8"))
+    LANGUAGE_RATE_LIMIT_RPS: float = float(os.getenv("REMOTE_LANGUAGE_RATE_LIMIT_RPS", "1"))
+    RATE_LIMIT_MIN_RPS: float = float(os.getenv("RATE_LIMIT_MIN_RPS", "0.05"))
+    RATE_LIMIT_MAX_RATE_FACTOR: float = float(os.getenv("RATE_LIMIT_MAX_RATE_FACTOR", "4"))
+    RATE_LIMIT_MAX_RETRIES: int = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "10"))
+    RATE_LIMIT_MAX_BACKOFF_SECONDS: float = float(os.getenv("RATE_LIMIT_MAX_BACKOFF_SECONDS", "60"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("REMOTE_HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("REMOTE_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP2: bool = os.getenv("REMOTE_HTTP2", "True") == "True"
+    LANGUAGE_OVERALL_SUMMARY_TOKEN_BUDGET: int = int(os.getenv("REMOTE_LANGUAGE_OVERALL_SUMMARY_TOKEN_BUDGET", "0"))
+    LANGUAGE_OVERALL_SUMMARY_FAN_IN: int = int(os.getenv("LANGUAGE_OVERALL_SUMMARY_FAN_IN", "8"))
+    LANGUAGE_COMPACT_ENTITY_CONTEXT: bool = os.getenv("LANGUAGE_COMPACT_ENTITY_CONTEXT") == "True"
+    LANGUAGE_ENTITY_CONTEXT_LIMIT: int = int(os.getenv("LANGUAGE_ENTITY_CONTEXT_LIMIT", "200"))
+    LANGUAGE_PARALLEL_ENTITY_EXTRACTION: bool = os.getenv("LANGUAGE_PARALLEL_ENTITY_EXTRACTION") == "True"
+    LANGUAGE_ENTITY_MERGE_EMBEDDINGS: bool = os.getenv("LANGUAGE_ENTITY_MERGE_EMBEDDINGS") == "True"
+    LANGUAGE_ENTITY_MERGE_EMBED_MODEL: str | None = os.getenv("REMOTE_LANGUAGE_ENTITY_MERGE_EMBED_MODEL")
+    LANGUAGE_ENTITY_MERGE_SIMILARITY: float = float(os.getenv("LANGUAGE_ENTITY_MERGE_SIMILARITY", "0.9"))
+    LANGUAGE_TOPIC_WINDOW_TOKENS: int = int(os.getenv("REMOTE_LANGUAGE_TOPIC_WINDOW_TOKENS", "0"))
+    LANGUAGE_TOPIC_WINDOW_OVERLAP_TOKENS: int = int(os.getenv("LANGUAGE_TOPIC_WINDOW_OVERLAP_TOKENS", "0"))
+    LANGUAGE_STREAM_JSON: bool = os.getenv("LANGUAGE_STREAM_JSON") == "True"
+    LANGUAGE_CACHE_ENABLED: bool = os.getenv("LANGUAGE_CACHE_ENABLED") == "True"
+    LANGUAGE_CACHE_PATH: str = os.getenv("LANGUAGE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "nvideo-language-cache.sqlite3"))
+    LANGUAGE_CACHE_TTL_SECONDS: int = int(os.getenv("LANGUAGE_CACHE_TTL_SECONDS", "604800"))
+    LANGUAGE_CACHE_MAX_ENTRIES: int = int(os.getenv("LANGUAGE_CACHE_MAX_ENTRIES", "10000"))
 
     LANGUAGE_SUMMARY_SYSTEM_PROMPT: str = os.getenv("LANGUAGE_SUMMARY_SYSTEM_PROMPT")
     LANGUAGE_OVERALL_SUMMARY_SYSTEM_PROMPT: str = os.getenv("LANGUAGE_OVERALL_SUMMARY_SYSTEM_PROMPT")
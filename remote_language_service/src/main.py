@@ -1,14 +1,18 @@
-﻿import logging
+﻿import asyncio
+import logging
 from fastapi import FastAPI, Depends
 from fastapi_utils.tasks import repeat_every
 from faststream.rabbit.fastapi import RabbitRouter, Logger
+from prometheus_client import make_asgi_app
 from google import genai
 from openai import AsyncOpenAI
 from shared.language import *
 from shared.models import SummaryResult
 from .config import AppConfiguration
 from shared.models import *
+from shared.api_helpers.clients import ClientRegistry
 from shared.api_helpers.decorators import fail_job_on_exception
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
 from .services.gemini_language_model import GeminiLanguageModel
 from .services.openai_language_model import OpenAILanguageModel
 
@@ -19,46 +23,115 @@ broker = router.broker
 app = FastAPI()
 app.include_router(router)
 
-gemini_client : genai.Client | None = None
-openai_client: AsyncOpenAI | None = None
+metrics_app = make_asgi_app()
+app.mount("/metrics", metrics_app)
 
-def get_gemini_client() -> genai.Client:
-    global gemini_client
-
-    if gemini_client is not None:
-        return gemini_client
+client_registry = ClientRegistry(
+    max_connections=AppConfiguration.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=AppConfiguration.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    http2=AppConfiguration.HTTP2
+)
+# shared across jobs, so concurrent jobs together stay within what the provider allows
+concurrency_limiter = asyncio.Semaphore(AppConfiguration.LANGUAGE_MAX_CONCURRENCY)
+response_cache: LanguageResponseCache | None = None
 
-    return genai.Client(api_key=AppConfiguration.LANGUAGE_MODEL_PROVIDER_API_KEY)
+def get_gemini_client() -> genai.Client:
+    return client_registry.gemini(AppConfiguration.LANGUAGE_MODEL_PROVIDER_API_KEY)
 
 def get_openai_client() -> AsyncOpenAI:
-    global openai_client
-    if openai_client is not None:
-        return openai_client
+    return client_registry.openai(
+        AppConfiguration.LANGUAGE_MODEL_PROVIDER_API_KEY,
+        base_url=AppConfiguration.LANGUAGE_MODEL_PROVIDER_BASE_URL
+    )
 
-    openai_client = AsyncOpenAI(
-        base_url=AppConfiguration.LANGUAGE_MODEL_PROVIDER_BASE_URL,
-        api_key=AppConfiguration.LANGUAGE_MODEL_PROVIDER_API_KEY,
+def get_response_cache() -> LanguageResponseCache:
+    global response_cache
+    if response_cache is None:
+        response_cache = LanguageResponseCache(
+            path=AppConfiguration.LANGUAGE_CACHE_PATH,
+            ttl_seconds=AppConfiguration.LANGUAGE_CACHE_TTL_SECONDS,
+            max_entries=AppConfiguration.LANGUAGE_CACHE_MAX_ENTRIES
+        )
+    return response_cache
+
+def get_provider_rate_limiter() -> AdaptiveRateLimiter:
+    return get_rate_limiter(
+        AppConfiguration.LANGUAGE_MODEL_PROVIDER,
+        get_language_model_name(),
+        initial_rate=AppConfiguration.LANGUAGE_RATE_LIMIT_RPS,
+        max_rate=AppConfiguration.LANGUAGE_RATE_LIMIT_RPS * AppConfiguration.RATE_LIMIT_MAX_RATE_FACTOR,
+        min_rate=AppConfiguration.RATE_LIMIT_MIN_RPS,
+        burst=AppConfiguration.LANGUAGE_MAX_CONCURRENCY,
+        max_retries=AppConfiguration.RATE_LIMIT_MAX_RETRIES,
+        max_backoff_seconds=AppConfiguration.RATE_LIMIT_MAX_BACKOFF_SECONDS,
+        logger=logging.getLogger("rate_limiter")
     )
-    return openai_client
 
-def get_model(
-        logger: Logger
+def get_provider_model(
+        logger: Logger,
+        rate_limiter: AdaptiveRateLimiter = Depends(get_provider_rate_limiter)
 ) -> LanguageModel:
     provider = AppConfiguration.LANGUAGE_MODEL_PROVIDER
     match provider:
         case "google":
             client = get_gemini_client()
-            return GeminiLanguageModel(get_language_model_name(), client, logger)
+            return GeminiLanguageModel(get_language_model_name(), client, logger, rate_limiter)
         case "openai":
             client = get_openai_client()
-            return OpenAILanguageModel(get_language_model_name(), client, logger)
+            return OpenAILanguageModel(get_language_model_name(), client, logger, rate_limiter)
         case _:
             client = get_openai_client()
-            return OpenAILanguageModel(get_language_model_name(), client, logger)
+            return OpenAILanguageModel(get_language_model_name(), client, logger, rate_limiter)
+
+def get_model(
+        logger: Logger,
+        model: LanguageModel = Depends(get_provider_model)
+) -> LanguageModel:
+    if not AppConfiguration.LANGUAGE_CACHE_ENABLED:
+        return model
+
+    return CachedLanguageModel(
+        model=model,
+        model_name=f"{AppConfiguration.LANGUAGE_MODEL_PROVIDER}-{get_language_model_name()}",
+        cache=get_response_cache(),
+        logger=logger
+    )
+
+def get_entity_merger() -> EntityMerger:
+    embed_model = AppConfiguration.LANGUAGE_ENTITY_MERGE_EMBED_MODEL
+    if not AppConfiguration.LANGUAGE_ENTITY_MERGE_EMBEDDINGS or not embed_model:
+        return EntityMerger()
+
+    rate_limiter = get_rate_limiter(
+        AppConfiguration.LANGUAGE_MODEL_PROVIDER,
+        embed_model,
+        initial_rate=AppConfiguration.LANGUAGE_RATE_LIMIT_RPS,
+        max_rate=AppConfiguration.LANGUAGE_RATE_LIMIT_RPS * AppConfiguration.RATE_LIMIT_MAX_RATE_FACTOR,
+        min_rate=AppConfiguration.RATE_LIMIT_MIN_RPS,
+        max_retries=AppConfiguration.RATE_LIMIT_MAX_RETRIES,
+        max_backoff_seconds=AppConfiguration.RATE_LIMIT_MAX_BACKOFF_SECONDS,
+        logger=logging.getLogger("rate_limiter")
+    )
+
+    async def embed(names: list[str]) -> list[list[float]]:
+        match AppConfiguration.LANGUAGE_MODEL_PROVIDER:
+            case "google":
+                client = get_gemini_client()
+                result = await rate_limiter.call(
+                    lambda: client.aio.models.embed_content(model=embed_model, contents=names))
+                return [embedding.values for embedding in result.embeddings]
+            case _:
+                client = get_openai_client()
+                result = await rate_limiter.call(
+                    lambda: client.embeddings.create(model=embed_model, input=names))
+                return [item.embedding for item in result.data]
+
+    return EntityMerger(embed=embed, similarity_threshold=AppConfiguration.LANGUAGE_ENTITY_MERGE_SIMILARITY)
 
 def get_language_service(
         logger: Logger,
-        model: LanguageModel = Depends(get_model)
+        model: LanguageModel = Depends(get_model),
+        entity_merger: EntityMerger = Depends(get_entity_merger)
 ):
     return LanguageService(
         logger=logger,
@@ -70,7 +143,17 @@ def get_language_service(
         tag_normalization_system_prompt=AppConfiguration.LANGUAGE_TAG_NORMALIZATION_SYSTEM_PROMPT,
         social_post_system_prompt=AppConfiguration.LANGUAGE_SOCIAL_POST_SYSTEM_PROMPT,
         tiktok_scenario_system_prompt=AppConfiguration.LANGUAGE_TIKTOK_SCENARIO_SYSTEM_PROMPT,
-        empty_chunk_threshold_ms=AppConfiguration.LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS
+        empty_chunk_threshold_ms=AppConfiguration.LANGUAGE_EMPTY_CHUNK_THRESHOLD_MS,
+        concurrency_limiter=concurrency_limiter,
+        overall_summary_token_budget=AppConfiguration.LANGUAGE_OVERALL_SUMMARY_TOKEN_BUDGET,
+        overall_summary_fan_in=AppConfiguration.LANGUAGE_OVERALL_SUMMARY_FAN_IN,
+        compact_entity_context=AppConfiguration.LANGUAGE_COMPACT_ENTITY_CONTEXT,
+        entity_context_limit=AppConfiguration.LANGUAGE_ENTITY_CONTEXT_LIMIT,
+        parallel_entity_extraction=AppConfiguration.LANGUAGE_PARALLEL_ENTITY_EXTRACTION,
+        entity_merger=entity_merger,
+        topic_window_tokens=AppConfiguration.LANGUAGE_TOPIC_WINDOW_TOKENS,
+        topic_window_overlap_tokens=AppConfiguration.LANGUAGE_TOPIC_WINDOW_OVERLAP_TOKENS,
+        stream_json=AppConfiguration.LANGUAGE_STREAM_JSON
     )
 
 def get_language_model_name() -> str:
@@ -94,6 +177,10 @@ async def startup(app: FastAPI):
 
     await publish_available_models()
 
+@router.on_broker_shutdown
+async def shutdown():
+    await client_registry.close()
+
 @repeat_every(seconds=10)
 async def publish_available_models():
     models = [
@@ -1,8 +1,10 @@
 from logging import Logger
+from typing import AsyncIterator
 from google import genai
 from google.genai.types import GenerateContentConfigDict, File
 from pydantic import BaseModel
 from shared.api_helpers.gemini import GeminiHelper
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter
 from shared.language.language_model import LanguageModel, TextMessage, FileMessage
 
 
@@ -11,12 +13,13 @@ class GeminiLanguageModel(LanguageModel):
             self,
             model_name: str,
             client: genai.Client,
-            logger: Logger
+            logger: Logger,
+            rate_limiter: AdaptiveRateLimiter
     ):
         self.__model_name = model_name
         self.__client = client
         self.__logger = logger
-        self.__helper = GeminiHelper(logger, client)
+        self.__helper = GeminiHelper(logger, client, rate_limiter)
 
     async def chat(
             self,
@@ -24,6 +27,45 @@ class GeminiLanguageModel(LanguageModel):
             system_prompt: str | None = None,
             schema: type[BaseModel] | None = None
     ) -> str:
+        contents, config, uploaded_file = await self.__create_request(messages, system_prompt, schema)
+
+        response = await self.__helper.generate_with_retry_and_congestion_backoff(
+            model_name=self.__model_name,
+            contents=contents,
+            config=config
+        )
+
+        await self.__delete_file(uploaded_file)
+
+        return response.text
+
+    async def chat_stream(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None = None,
+            schema: type[BaseModel] | None = None
+    ) -> AsyncIterator[str]:
+        contents, config, uploaded_file = await self.__create_request(messages, system_prompt, schema)
+
+        stream = self.__helper.generate_stream(
+            model_name=self.__model_name,
+            contents=contents,
+            config=config
+        )
+        try:
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            await stream.aclose()
+            await self.__delete_file(uploaded_file)
+
+    async def __create_request(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None,
+            schema: type[BaseModel] | None
+    ) -> tuple[list, GenerateContentConfigDict | None, File | None]:
         contents = []
         uploaded_file : File | None = None
         for message in messages:
@@ -49,16 +91,11 @@ class GeminiLanguageModel(LanguageModel):
                     response_schema=schema
             )
 
-        response = await self.__helper.generate_with_retry_and_congestion_backoff(
-            model_name=self.__model_name,
-            contents=contents,
-            config=config
-        )
+        return contents, config, uploaded_file
 
+    async def __delete_file(self, uploaded_file: File | None):
         try:
             if uploaded_file is not None:
                 await self.__client.aio.files.delete(name=uploaded_file.name)
         except Exception:
             self.__logger.warning(f"Failed to clean up file.", exc_info=True)
-
-        return response.text
\ No newline at end of file
@@ -1,19 +1,57 @@
 import json
 from logging import Logger
+from typing import AsyncIterator
 from pydantic import BaseModel
 from openai import AsyncOpenAI
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter
 from shared.language.language_model import LanguageModel, TextMessage, FileMessage
 
 class OpenAILanguageModel(LanguageModel):
-    def __init__(self, model_name: str, client: AsyncOpenAI, logger: Logger):
+    def __init__(self, model_name: str, client: AsyncOpenAI, logger: Logger, rate_limiter: AdaptiveRateLimiter):
         self.__model_name = model_name
         self.__client = client
         self.__logger = logger
+        self.__rate_limiter = rate_limiter
 
     async def chat(self,
                    messages: list[TextMessage | FileMessage],
                    system_prompt: str | None = None,
                    schema: type[BaseModel] | None = None) -> str:
+        api_messages, kwargs = self.__create_request(messages, system_prompt, schema)
+
+        response = await self.__rate_limiter.call(lambda: self.__client.chat.completions.create(
+            model=self.__model_name,
+            messages=api_messages,
+            **kwargs
+        ))
+
+        return response.choices[0].message.content
+
+    async def chat_stream(self,
+                          messages: list[TextMessage | FileMessage],
+                          system_prompt: str | None = None,
+                          schema: type[BaseModel] | None = None) -> AsyncIterator[str]:
+        api_messages, kwargs = self.__create_request(messages, system_prompt, schema)
+
+        # throttling is reported when the stream is opened, before any part arrives
+        stream = await self.__rate_limiter.call(lambda: self.__client.chat.completions.create(
+            model=self.__model_name,
+            messages=api_messages,
+            stream=True,
+            **kwargs
+        ))
+
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    def __create_request(self,
+                         messages: list[TextMessage | FileMessage],
+                         system_prompt: str | None,
+                         schema: type[BaseModel] | None) -> tuple[list[dict], dict]:
         api_messages = []
 
         if system_prompt:
@@ -34,10 +72,4 @@ class OpenAILanguageModel(LanguageModel):
             })
             kwargs["response_format"] = {"type": "json_object"}
 
-        response = await self.__client.chat.completions.create(
-            model=self.__model_name,
-            messages=api_messages,
-            **kwargs
-        )
-
-        return response.choices[0].message.content
\ No newline at end of file
+        return api_messages, kwargs
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class AppConfiguration:
     __RMQ_USER: str = os.getenv("RABBITMQ_USER")
@@ -12,4 +13,25 @@ class AppConfiguration:
     TRANSCRIPTION_PROVIDER_API_KEY: str = os.getenv("REMOTE_TRANSCRIPTION_PROVIDER_API_KEY")
     TRANSCRIPTION_MODEL: str = os.getenv("REMOTE_TRANSCRIPTION_MODEL")
     TRANSCRIPTION_CHUNK_SECONDS: int = int(os.getenv("TRANSCRIPTION_CHUNK_SECONDS"))
-    LLM_TRANSCRIPTION_PROMPT: str = os.getenv("REMOTE_TRANSCRIPTION_LLM_PROMPT")
\ No newline at end of file
+    TRANSCRIPTION_WHOLE_FILE: bool = os.getenv("REMOTE_TRANSCRIPTION_WHOLE_FILE") == "True"
+    TRANSCRIPTION_WHOLE_FILE_MAX_SECONDS: int = int(os.getenv("REMOTE_TRANSCRIPTION_WHOLE_FILE_MAX_SECONDS", "0"))
+    TRANSCRIPTION_SEGMENTATION: str = os.getenv("REMOTE_TRANSCRIPTION_SEGMENTATION", "utterances")
+    TRANSCRIPTION_MAX_CONCURRENCY: int = int(os.getenv("REMOTE_TRANSCRIPTION_MAX_CONCURRENCY", "4"))
+    TRANSCRIPTION_RATE_LIMIT_RPS: float = float(os.getenv("REMOTE_TRANSCRIPTION_RATE_LIMIT_RPS", "1"))
+    RATE_LIMIT_MIN_RPS: float = float(os.getenv("RATE_LIMIT_MIN_RPS", "0.05"))
+    RATE_LIMIT_MAX_RATE_FACTOR: float = float(os.getenv("RATE_LIMIT_MAX_RATE_FACTOR", "4"))
+    RATE_LIMIT_MAX_RETRIES: int = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "10"))
+    RATE_LIMIT_MAX_BACKOFF_SECONDS: float = float(os.getenv("RATE_LIMIT_MAX_BACKOFF_SECONDS", "60"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("REMOTE_HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("REMOTE_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP2: bool = os.getenv("REMOTE_HTTP2", "True") == "True"
+    # "opus", "mp3" or "copy", defaults to what suits the provider
+    TRANSCRIPTION_UPLOAD_FORMAT: str | None = os.getenv("REMOTE_TRANSCRIPTION_UPLOAD_FORMAT")
+    TRANSCRIPTION_UPLOAD_BITRATE: str | None = os.getenv("REMOTE_TRANSCRIPTION_UPLOAD_BITRATE")
+    TRANSCRIPTION_SPLIT_ON_SILENCE: bool = os.getenv("TRANSCRIPTION_SPLIT_ON_SILENCE") == "True"
+    TRANSCRIPTION_SILENCE_NOISE_DB: float = float(os.getenv("TRANSCRIPTION_SILENCE_NOISE_DB", "-35"))
+    TRANSCRIPTION_SILENCE_MIN_MS: int = int(os.getenv("TRANSCRIPTION_SILENCE_MIN_MS", "500"))
+    AUDIO_CACHE_DIR: str = os.getenv("AUDIO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "nvideo-audio-cache"))
+    AUDIO_CACHE_MAX_MB: int = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+    LLM_TRANSCRIPTION_PROMPT: str = os.getenv("REMOTE_TRANSCRIPTION_LLM_PROMPT")
+    LLM_TIMED_TRANSCRIPTION_PROMPT: str = os.getenv("REMOTE_TRANSCRIPTION_LLM_TIMED_PROMPT")
\ No newline at end of file
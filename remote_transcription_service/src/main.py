@@ -1,15 +1,18 @@
-﻿import asyncio
+﻿import functools
 import logging
-import os
 from deepgram import DeepgramClient
 from fastapi import FastAPI, Depends
 from fastapi_utils.tasks import repeat_every
 from faststream.rabbit.fastapi import RabbitRouter, Logger
+from prometheus_client import make_asgi_app
 from shared.audio import *
+from shared.audio import split_audio, split_audio_on_silence
 from shared.transcription import *
 from shared.models import *
-from shared.transcription.utils import convert_to_chunk_results
+from shared.transcription.utils import convert_to_chunk_results, describe_chunking
+from shared.api_helpers.clients import ClientRegistry
 from shared.api_helpers.decorators import fail_job_on_exception
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
 from .services.gemini_transcription_model import GeminiTranscriptionModel
 from .services.deepgram_transcription_model import DeepgramTranscriptionModel
 from .services.openai_transcription_model import OpenAITranscriptionModel
@@ -24,59 +27,83 @@ transcription_provider = AppConfiguration.TRANSCRIPTION_PROVIDER
 transcription_model_full_name = \
     f"transcription.remote-{transcription_provider}-{transcription_model_name}"
 
+# Gemini does not list Opus among its audio formats
+default_upload_formats = {
+    "deepgram": "opus",
+    "google": "mp3",
+    "openai": "opus"
+}
+
 router = RabbitRouter(AppConfiguration.AMQP_URL, fail_fast=False)
 broker = router.broker
 app = FastAPI()
 app.include_router(router)
 
-deepgram_client : DeepgramClient | None = None
-gemini_client : genai.Client | None = None
-openai_client: AsyncOpenAI | None = None
-
-def get_deepgram_client():
-    global deepgram_client
+metrics_app = make_asgi_app()
+app.mount("/metrics", metrics_app)
 
-    if deepgram_client is not None:
-        return deepgram_client
+client_registry = ClientRegistry(
+    max_connections=AppConfiguration.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=AppConfiguration.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    http2=AppConfiguration.HTTP2
+)
+audio_cache : AudioCache | None = None
+chunking : str | None = None
 
-    return DeepgramClient(api_key=AppConfiguration.TRANSCRIPTION_PROVIDER_API_KEY)
+def get_deepgram_client() -> DeepgramClient:
+    return client_registry.deepgram(AppConfiguration.TRANSCRIPTION_PROVIDER_API_KEY)
 
 def get_gemini_client() -> genai.Client:
-    global gemini_client
-
-    if gemini_client is not None:
-        return gemini_client
-
-    return genai.Client(api_key=AppConfiguration.TRANSCRIPTION_PROVIDER_API_KEY)
+    return client_registry.gemini(AppConfiguration.TRANSCRIPTION_PROVIDER_API_KEY)
 
 def get_openai_client() -> AsyncOpenAI:
-    global openai_client
-    if openai_client is not None:
-        return openai_client
-
-    openai_client = AsyncOpenAI(
-        base_url=AppConfiguration.TRANSCRIPTION_PROVIDER_BASE_URL,
-        api_key=AppConfiguration.TRANSCRIPTION_PROVIDER_API_KEY
+    return client_registry.openai(
+        AppConfiguration.TRANSCRIPTION_PROVIDER_API_KEY,
+        base_url=AppConfiguration.TRANSCRIPTION_PROVIDER_BASE_URL
     )
-    return openai_client
 
 def get_custom_logger(name: str | None) -> logging.Logger:
     return logging.getLogger(name)
 
+def get_provider_rate_limiter() -> AdaptiveRateLimiter:
+    return get_rate_limiter(
+        transcription_provider,
+        transcription_model_name,
+        initial_rate=AppConfiguration.TRANSCRIPTION_RATE_LIMIT_RPS,
+        max_rate=AppConfiguration.TRANSCRIPTION_RATE_LIMIT_RPS * AppConfiguration.RATE_LIMIT_MAX_RATE_FACTOR,
+        min_rate=AppConfiguration.RATE_LIMIT_MIN_RPS,
+        burst=AppConfiguration.TRANSCRIPTION_MAX_CONCURRENCY,
+        max_retries=AppConfiguration.RATE_LIMIT_MAX_RETRIES,
+        max_backoff_seconds=AppConfiguration.RATE_LIMIT_MAX_BACKOFF_SECONDS,
+        logger=get_custom_logger("rate_limiter")
+    )
+
 def get_deepgram_model() -> DeepgramTranscriptionModel:
     client = get_deepgram_client()
     logger = get_custom_logger("deepgram")
-    return DeepgramTranscriptionModel(logger, transcription_model_name, client)
+    return DeepgramTranscriptionModel(
+        logger,
+        transcription_model_name,
+        client,
+        get_provider_rate_limiter(),
+        segmentation=AppConfiguration.TRANSCRIPTION_SEGMENTATION
+    )
 
 def get_gemini_model() -> GeminiTranscriptionModel:
     client = get_gemini_client()
     logger = get_custom_logger("gemini")
-    return GeminiTranscriptionModel(logger, transcription_model_name, client)
+    return GeminiTranscriptionModel(
+        logger,
+        transcription_model_name,
+        client,
+        get_provider_rate_limiter(),
+        timed=AppConfiguration.TRANSCRIPTION_WHOLE_FILE
+    )
 
 def get_openai_model() -> OpenAITranscriptionModel:
     client = get_openai_client()
     logger = get_custom_logger("openai")
-    return OpenAITranscriptionModel(logger, transcription_model_name, client)
+    return OpenAITranscriptionModel(logger, transcription_model_name, client, get_provider_rate_limiter())
 
 def get_transcription_service():
     model: TranscriptionModel
@@ -90,11 +117,64 @@ def get_transcription_service():
         case _:
             model = get_openai_model()
 
-    return TranscriptionService(model)
+    # providers that cannot take the whole file keep splitting it
+    whole_file = AppConfiguration.TRANSCRIPTION_WHOLE_FILE and model.supports_whole_file
+
+    return TranscriptionService(
+        model,
+        max_concurrency=AppConfiguration.TRANSCRIPTION_MAX_CONCURRENCY,
+        # whole-file transcription rebuilds fixed-length chunks, files that are split after all get the same ones
+        splitter=get_splitter(split_on_silence=AppConfiguration.TRANSCRIPTION_SPLIT_ON_SILENCE and not whole_file),
+        whole_file=whole_file,
+        max_whole_file_ms=AppConfiguration.TRANSCRIPTION_WHOLE_FILE_MAX_SECONDS * 1000,
+        encode_profile=get_encode_profile(),
+        logger=get_custom_logger("transcription")
+    )
+
+def get_encode_profile() -> EncodeProfile | None:
+    upload_format = AppConfiguration.TRANSCRIPTION_UPLOAD_FORMAT \
+        or default_upload_formats.get(transcription_provider, "opus")
+    return get_upload_profile(upload_format, bitrate=AppConfiguration.TRANSCRIPTION_UPLOAD_BITRATE)
+
+def get_splitter(split_on_silence: bool):
+    if not split_on_silence:
+        return functools.partial(
+            split_audio,
+            encode_profile=get_encode_profile()
+        )
+
+    return functools.partial(
+        split_audio_on_silence,
+        noise_db=AppConfiguration.TRANSCRIPTION_SILENCE_NOISE_DB,
+        min_silence_ms=AppConfiguration.TRANSCRIPTION_SILENCE_MIN_MS,
+        encode_profile=get_encode_profile()
+    )
+
+def get_chunking() -> str:
+    # only depends on the configuration, worked out once instead of on every heartbeat
+    global chunking
+    if chunking is None:
+        transcription = get_transcription_service()
+        chunking = describe_chunking(
+            AppConfiguration.TRANSCRIPTION_SPLIT_ON_SILENCE and not transcription.whole_file,
+            silence_noise_db=AppConfiguration.TRANSCRIPTION_SILENCE_NOISE_DB,
+            min_silence_ms=AppConfiguration.TRANSCRIPTION_SILENCE_MIN_MS
+        )
+    return chunking
 
 def get_download_service():
     return DownloadService()
 
+def get_audio_cache() -> AudioCache:
+    global audio_cache
+    if audio_cache is None:
+        audio_cache = AudioCache(
+            download=get_download_service(),
+            cache_dir=AppConfiguration.AUDIO_CACHE_DIR,
+            max_size_bytes=AppConfiguration.AUDIO_CACHE_MAX_MB * 1024 * 1024
+        )
+    return audio_cache
+
 @router.after_startup
 async def startup(app: FastAPI):
     await broker.connect()
@@ -102,10 +182,16 @@ async def startup(app: FastAPI):
 
     await publish_available_models()
 
+@router.on_broker_shutdown
+async def shutdown():
+    await client_registry.close()
+
 @repeat_every(seconds=10)
 async def publish_available_models():
     await broker.publish(ModelAvailable(
-        model_name=transcription_model_full_name
+        model_name=transcription_model_full_name,
+        chunk_length_ms=AppConfiguration.TRANSCRIPTION_CHUNK_SECONDS * 1000,
+        chunking=get_chunking()
     ), queue="model.available")
 
 @router.subscriber(transcription_model_full_name)
@@ -113,28 +199,27 @@ async def publish_available_models():
 async def transcribe_remote(
         body: TranscriptionRequest,
         logger: Logger,
-        download: DownloadService = Depends(get_download_service),
+        cache: AudioCache = Depends(get_audio_cache),
         transcription: TranscriptionService = Depends(get_transcription_service)
 ):
     logger.info(f"Handling transcription request for {body.video_id}...")
 
-    path = await asyncio.to_thread(download.download_video_by_id, body.video_id)
-    logger.info(f"Downloaded {body.video_id} to {path}")
-
     segment_length_ms = AppConfiguration.TRANSCRIPTION_CHUNK_SECONDS * 1000
 
     chunks = list()
-    async for chunk in transcription.transcribe(path, segment_length_ms):
-        chunks.append(chunk)
-        logger.info(f"Transcribed chunk at {chunk.start_time_ms} of {body.video_id}")
+    async with cache.acquire(body.video_id) as path:
+        logger.info(f"Audio for {body.video_id} is at {path}")
+
+        async for chunk in transcription.transcribe(path, segment_length_ms):
+            chunks.append(chunk)
+            logger.info(f"Transcribed chunk at {chunk.start_time_ms} of {body.video_id}")
     logger.info(f"Transcribed video {body.video_id}")
 
     response=TranscriptionResponse(
         job_id = body.job_id,
-        result = convert_to_chunk_results(chunks)
+        result = convert_to_chunk_results(chunks),
+        chunk_length_ms = segment_length_ms,
+        chunking = get_chunking()
     )
 
-    await broker.publish(response, queue="transcription.result")
-
-    if os.path.exists(path):
-        os.remove(path)
\ No newline at end of file
+    await broker.publish(response, queue="transcription.result")
\ No newline at end of file
@@ -1,50 +1,114 @@
+import asyncio
+import os
 from logging import Logger
+from typing import AsyncIterator
 import httpx
 from deepgram import *
-from shared.transcription import TranscriptionModel
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter
+from shared.transcription import TranscriptionModel, TimedTranscription
+
+# the upload is read and sent this much at a time, instead of loading the whole file into memory
+UPLOAD_BLOCK_SIZE = 1024 * 1024
 
 class DeepgramTranscriptionModel(TranscriptionModel):
     def __init__(
             self,
             logger: Logger,
             model_name: str,
-            client: DeepgramClient):
+            client: DeepgramClient,
+            rate_limiter: AdaptiveRateLimiter,
+            read_retries: int = 5,
+            segmentation: str = "utterances"):
+        """
+        :param segmentation: "utterances" or "paragraphs", the segments whose timings are reported.
+        """
         self.__logger = logger
         self.__model_name : str = model_name
         self.__client = client
+        self.__rate_limiter = rate_limiter
+        self.__read_retries = read_retries
+        self.__paragraphs = segmentation == "paragraphs"
 
         if "/" in self.__model_name:
             self.__model_name = self.__model_name.split('/')[-1]
 
+    @property
+    def supports_whole_file(self) -> bool:
+        return True
+
     def ensure_loaded(self):
         pass
 
     def unload(self):
         pass
 
-    async def transcribe(self, file_path):
-        with open(file_path, "rb") as file:
-            file_data = file.read()
-
-        payload: FileSource = {
-            "buffer": file_data
-        }
-
+    async def transcribe(self, file_path) -> str | TimedTranscription:
         options = PrerecordedOptions(
             model=self.__model_name,
-            smart_format=True
+            smart_format=True,
+            utterances=not self.__paragraphs,
+            paragraphs=self.__paragraphs
         )
+
         response: PrerecordedResponse | None = None
-        retries = 5
-        for i in range(1, retries):
+        last_exception: Exception | None = None
+        retries = self.__read_retries
+        for i in range(1, retries + 1):
             try:
-                response = await self.__client.listen.asyncrest.v("1").transcribe_file(
-                    payload, options, timeout=httpx.Timeout(300, connect=60)
-                )
+                response = await self.__rate_limiter.call(lambda: self.__transcribe_file(file_path, options))
                 break
-            except httpx.ReadTimeout | httpx.ReadError:
+            except (httpx.ReadTimeout, httpx.ReadError, httpx.WriteTimeout, httpx.WriteError) as e:
+                last_exception = e
                 self.__logger.info(f"Read error. Retrying ({i} out of {retries})")
 
-        result = response.results.channels[0].alternatives[0].transcript
+        if response is None and last_exception is not None:
+            self.__logger.info("Max retry count reached.")
+            raise last_exception
+
+        alternative = response.results.channels[0].alternatives[0]
+        text = alternative.transcript
+
+        if self.__paragraphs:
+            paragraphs = alternative.paragraphs.paragraphs if alternative.paragraphs else None
+            if not paragraphs:
+                return text
 
-        return result
\ No newline at end of file
+            return TimedTranscription(
+                text=text,
+                segment_offsets_ms=[int(round(paragraph.start * 1000)) for paragraph in paragraphs],
+                segment_texts=[
+                    " ".join(sentence.text for sentence in paragraph.sentences)
+                    for paragraph in paragraphs
+                ]
+            )
+
+        utterances = response.results.utterances
+        if not utterances:
+            return text
+
+        return TimedTranscription(
+            text=text,
+            segment_offsets_ms=[int(round(utterance.start * 1000)) for utterance in utterances],
+            segment_texts=[utterance.transcript for utterance in utterances]
+        )
+
+    async def __transcribe_file(self, file_path: str, options: PrerecordedOptions) -> PrerecordedResponse:
+        # every attempt streams the file again from the start
+        payload: StreamSource = {
+            "stream": self.__read_blocks(file_path)
+        }
+
+        return await self.__client.listen.asyncrest.v("1").transcribe_file(
+            payload,
+            options,
+            headers={"Content-Length": str(os.path.getsize(file_path))},
+            timeout=httpx.Timeout(300, connect=60)
+        )
+
+    async def __read_blocks(self, file_path: str) -> AsyncIterator[bytes]:
+        with open(file_path, "rb") as file:
+            while True:
+                block = await asyncio.to_thread(file.read, UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block
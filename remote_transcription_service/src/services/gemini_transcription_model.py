@@ -1,44 +1,113 @@
 from logging import Logger
 from google import genai
-from google.genai.types import GenerateContentConfigDict, GenerateContentResponse
+from google.genai.types import GenerateContentConfigDict, GenerateContentResponse, FinishReason
+from pydantic import BaseModel, ValidationError
 from shared.api_helpers.gemini import GeminiHelper
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter
 from ..config import AppConfiguration
-from shared.transcription import TranscriptionModel
+from shared.transcription import TranscriptionModel, TimedTranscription, WholeFileTranscriptionError
+
+
+class TranscriptSegment(BaseModel):
+    start: str
+    text: str
+
+class TimedTranscript(BaseModel):
+    segments: list[TranscriptSegment]
+
 
 class GeminiTranscriptionModel(TranscriptionModel):
     def __init__(
             self,
             logger: Logger,
             model_name: str,
-            client: genai.Client):
+            client: genai.Client,
+            rate_limiter: AdaptiveRateLimiter,
+            timed: bool = False):
+        """
+        :param timed: ask for a timestamp per segment and return a TimedTranscription,
+        which lets the whole file be transcribed in one request.
+        """
         self.__logger = logger
         self.__model_name : str = model_name
         self.__client = client
-        self.__helper = GeminiHelper(logger, client)
+        self.__helper = GeminiHelper(logger, client, rate_limiter)
+        self.__timed = timed
 
         if "/" in self.__model_name:
             self.__model_name = self.__model_name.split('/')[-1]
 
+    @property
+    def supports_whole_file(self) -> bool:
+        return self.__timed
+
     def ensure_loaded(self):
         pass
 
     def unload(self):
         pass
 
-    async def transcribe(self, file_path):
+    async def transcribe(self, file_path) -> str | TimedTranscription:
         audio = await self.__client.aio.files.upload(file=file_path)
-        prompt = AppConfiguration.LLM_TRANSCRIPTION_PROMPT
-        config = GenerateContentConfigDict(
-            system_instruction=prompt
-        )
 
-        response = await self.__helper.generate_with_retry_and_congestion_backoff(self.__model_name, audio, config)
+        if self.__timed:
+            config = GenerateContentConfigDict(
+                system_instruction=AppConfiguration.LLM_TIMED_TRANSCRIPTION_PROMPT,
+                response_mime_type="application/json",
+                response_schema=TimedTranscript
+            )
+        else:
+            config = GenerateContentConfigDict(
+                system_instruction=AppConfiguration.LLM_TRANSCRIPTION_PROMPT
+            )
+
+        try:
+            response = await self.__helper.generate_with_retry_and_congestion_backoff(self.__model_name, audio, config)
+        finally:
+            try:
+                await self.__client.aio.files.delete(name=audio.name)
+            except Exception:
+                self.__logger.warning(f"Failed to clean up file.", exc_info=True)
 
-        result = response.text
+        if not self.__timed:
+            return response.text
+
+        return self.__to_timed_transcription(response)
+
+    def __to_timed_transcription(self, response: GenerateContentResponse) -> TimedTranscription:
+        # long audio can need more output than the model may generate, the JSON is then cut off
+        if response.candidates and response.candidates[0].finish_reason == FinishReason.MAX_TOKENS:
+            raise WholeFileTranscriptionError("The transcript hit the output token limit")
+
+        try:
+            transcript = TimedTranscript.model_validate_json(response.text or "")
+        except ValidationError as e:
+            raise WholeFileTranscriptionError(f"The transcript is not valid JSON: {e}") from e
+        segments = [segment for segment in transcript.segments if segment.text.strip()]
+
+        offsets: list[int] = []
+        for segment in segments:
+            offset = self.__parse_timestamp_ms(segment.start)
+            if offset is None:
+                self.__logger.warning(f"Unreadable timestamp {segment.start!r}, using the previous one")
+                offset = offsets[-1] if offsets else 0
+            offsets.append(offset)
+
+        return TimedTranscription(
+            text=" ".join(segment.text.strip() for segment in segments),
+            segment_offsets_ms=offsets,
+            segment_texts=[segment.text.strip() for segment in segments]
+        )
 
+    def __parse_timestamp_ms(self, timestamp: str) -> int | None:
+        """
+        Parses MM:SS or HH:MM:SS, optionally with fractional seconds.
+        """
+        seconds = 0.0
         try:
-            await self.__client.aio.files.delete(name=audio.name)
-        except Exception:
-            self.__logger.warning(f"Failed to clean up file.", exc_info=True)
+            for part in timestamp.strip().split(":"):
+                seconds = seconds * 60 + float(part)
+        except ValueError:
+            return None
 
-        return result
\ No newline at end of file
+        return int(round(seconds * 1000))
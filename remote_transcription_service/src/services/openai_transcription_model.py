@@ -1,12 +1,14 @@
 from logging import Logger
 from openai import AsyncOpenAI
+from shared.api_helpers.rate_limiter import AdaptiveRateLimiter
 from shared.transcription import TranscriptionModel
 
 class OpenAITranscriptionModel(TranscriptionModel):
-    def __init__(self, logger: Logger, model_name: str, client: AsyncOpenAI):
+    def __init__(self, logger: Logger, model_name: str, client: AsyncOpenAI, rate_limiter: AdaptiveRateLimiter):
         self.__logger = logger
         self.__model_name = model_name
         self.__client = client
+        self.__rate_limiter = rate_limiter
 
     def ensure_loaded(self):
         pass
@@ -16,9 +18,14 @@ class OpenAITranscriptionModel(TranscriptionModel):
 
     async def transcribe(self, file_path: str):
         with open(file_path, "rb") as audio_file:
-            response = await self.__client.audio.transcriptions.create(
-                file=audio_file,
-                model=self.__model_name,
-                response_format="text"
-            )
-        return response
\ No newline at end of file
+            response = await self.__rate_limiter.call(lambda: self.__create(audio_file))
+        return response
+
+    async def __create(self, audio_file):
+        # a retry sends the file again from the start
+        audio_file.seek(0)
+        return await self.__client.audio.transcriptions.create(
+            file=audio_file,
+            model=self.__model_name,
+            response_format="text"
+        )
\ No newline at end of file
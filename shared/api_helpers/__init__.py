@@ -1,3 +1,3 @@
 __all__ = [
-    # gemini, decorators - unsafe because there might be services that do not have the required packages
+    # gemini, decorators, rate_limiter - unsafe because there might be services that do not have the required packages
 ]
\ No newline at end of file
@@ -0,0 +1,104 @@
+import importlib.util
+import logging
+from logging import Logger
+from typing import Any
+import httpx
+
+
+class ClientRegistry:
+    """
+    Keeps one long-lived SDK client per provider and credential for the whole worker,
+    so jobs reuse pooled connections instead of opening new ones with a TLS handshake each.
+    SDKs are imported on first use, a service only needs the packages of the providers it calls.
+    HTTP/2 is only enabled when the h2 package is installed.
+    SDK retries are turned off, throttled calls are retried by the AdaptiveRateLimiter of the caller,
+    which also lowers its rate when it sees them.
+    """
+    def __init__(
+            self,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry_seconds: float = 30,
+            http2: bool = True,
+            logger: Logger = logging.getLogger()
+    ):
+        self.__limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds
+        )
+        self.__http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.__logger = logger
+        self.__clients: dict[tuple[str, str | None, str | None], Any] = {}
+
+        if http2 and not self.__http2:
+            self.__logger.info("h2 is not installed, provider clients use HTTP/1.1")
+
+    def gemini(self, api_key: str):
+        key = ("google", api_key, None)
+        client = self.__clients.get(key)
+        if client is None:
+            from google import genai
+            # google-genai only retries when http_options has retry_options
+            client = genai.Client(
+                api_key=api_key,
+                http_options={
+                    "client_args": self.__httpx_args(),
+                    "async_client_args": self.__httpx_args()
+                }
+            )
+            self.__clients[key] = client
+        return client
+
+    def openai(self, api_key: str, base_url: str | None = None):
+        key = ("openai", api_key, base_url)
+        client = self.__clients.get(key)
+        if client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            client = AsyncOpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(**self.__httpx_args())
+            )
+            self.__clients[key] = client
+        return client
+
+    def deepgram(self, api_key: str):
+        # the SDK opens its own connection per request and doesn't retry, only the client itself can be reused
+        key = ("deepgram", api_key, None)
+        client = self.__clients.get(key)
+        if client is None:
+            from deepgram import DeepgramClient
+            client = DeepgramClient(api_key=api_key)
+            self.__clients[key] = client
+        return client
+
+    async def close(self):
+        """
+        Closes the connection pools of every client. Call once, when the worker shuts down.
+        """
+        clients = list(self.__clients.items())
+        self.__clients.clear()
+
+        for (provider, _, _), client in clients:
+            try:
+                match provider:
+                    case "google":
+                        # older google-genai versions have no way to close the client
+                        aio_close = getattr(client.aio, "aclose", None)
+                        if aio_close is not None:
+                            await aio_close()
+                        close = getattr(client, "close", None)
+                        if close is not None:
+                            close()
+                    case "openai":
+                        await client.close()
+            except Exception:
+                self.__logger.warning(f"Failed to close the {provider} client.", exc_info=True)
+
+    def __httpx_args(self) -> dict:
+        return {
+            "limits": self.__limits,
+            "http2": self.__http2
+        }
@@ -1,11 +1,10 @@
-import asyncio
 from logging import Logger
-from typing import Union
+from typing import AsyncIterator, Union
 import google
 import httpx
 from google import genai
 from google.genai.types import GenerateContentConfigDict, GenerateContentResponse
-from google.genai.errors import ClientError
+from .rate_limiter import AdaptiveRateLimiter
 
 
 class GeminiHelper:
@@ -13,14 +12,12 @@ class GeminiHelper:
             self,
             logger: Logger,
             client: google.genai.Client,
-            read_retries: int = 5,
-            congestion_retries: int = 60,
-            congestion_sleep_seconds: int = 10
+            rate_limiter: AdaptiveRateLimiter,
+            read_retries: int = 5
     ):
         self.__logger = logger
         self.__client = client
-        self.__congestion_sleep_seconds = congestion_sleep_seconds
-        self.__congestion_retries = congestion_retries
+        self.__rate_limiter = rate_limiter
         self.__read_retries = read_retries
 
 
@@ -53,39 +50,8 @@ class GeminiHelper:
             model_name: str,
             contents: Union[google.genai.types.ContentListUnion, google.genai.types.ContentListUnionDict],
             config: GenerateContentConfigDict) -> GenerateContentResponse:
-        sleep_seconds = self.__congestion_sleep_seconds
-        retries = self.__congestion_retries
-
-        response: GenerateContentResponse | None = None
-        last_exception: Exception | None = None
-        for i in range(1, retries+1):
-            try:
-                response = await self.generate(model_name, contents, config)
-                break
-            except ClientError as e:
-                # treat 499 "canceled" the same as 429 "resource exhausted".
-                # 499 likely means there's a problem on Google's side:
-                # https://discuss.ai.google.dev/t/anyone-experiencing-google-api-core-exceptions-cancelled-499-the-operation-was-cancelled/80743
-                if e.code != 429 and e.code != 499 and e.code != 503:
-                    raise
-                last_exception = e
-
-                error_type = "Client error"
-                if e.code == 429:
-                    error_type = "Resource exhaustion error"
-                elif e.code == 499:
-                    error_type = "Request canceled"
-                elif e.code == 503:
-                    error_type = "Experiencing high demand"
-
-                self.__logger.info(f"{error_type}. Retrying in {sleep_seconds} ({i} out of {retries})")
-                await asyncio.sleep(sleep_seconds)
-
-        if response is None and last_exception is not None:
-            self.__logger.info("Max retry count reached.")
-            raise last_exception
-
-        return response
+        # 429, 499 and 503 are retried by the rate limiter, which also slows down every other caller of the model
+        return await self.__rate_limiter.call(lambda: self.generate(model_name, contents, config))
 
 
     async def generate(
@@ -97,4 +63,32 @@ class GeminiHelper:
             model=model_name,
             contents=contents,
             config=config
-        )
\ No newline at end of file
+        )
+
+
+    async def generate_stream(
+            self,
+            model_name: str,
+            contents: Union[google.genai.types.ContentListUnion, google.genai.types.ContentListUnionDict],
+            config: GenerateContentConfigDict) -> AsyncIterator[GenerateContentResponse]:
+        async def open_stream():
+            stream = await self.__client.aio.models.generate_content_stream(
+                model=model_name,
+                contents=contents,
+                config=config
+            )
+            # the request is only sent when the first part is read, so throttling surfaces here
+            try:
+                return stream, await anext(stream, None)
+            except Exception:
+                await stream.aclose()
+                raise
+
+        stream, first = await self.__rate_limiter.call(open_stream)
+        try:
+            if first is not None:
+                yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
@@ -0,0 +1,269 @@
+import asyncio
+import email.utils
+import logging
+import random
+import re
+import threading
+import time
+from logging import Logger
+from typing import Awaitable, Callable, TypeVar
+from prometheus_client import Counter, Gauge
+
+RATE_LIMIT_RATE_GAUGE = Gauge(
+    'nvideo_rate_limit_requests_per_second',
+    'Requests per second the client-side rate limiter currently allows',
+    ['provider', 'model']
+)
+RATE_LIMIT_THROTTLED_SECONDS_COUNTER = Counter(
+    'nvideo_rate_limit_throttled_seconds',
+    'Time callers spent waiting for the rate limiter or backing off after a throttled response',
+    ['provider', 'model']
+)
+RATE_LIMIT_THROTTLED_RESPONSES_COUNTER = Counter(
+    'nvideo_rate_limit_throttled_responses',
+    'Responses the provider rejected because of rate limits or congestion',
+    ['provider', 'model', 'status']
+)
+
+# 499 "canceled" is treated the same as 429 "resource exhausted", it likely means there's a problem on Google's side:
+# https://discuss.ai.google.dev/t/anyone-experiencing-google-api-core-exceptions-cancelled-499-the-operation-was-cancelled/80743
+THROTTLING_STATUSES = (429, 499, 503)
+
+_RETRY_DELAY_RE = re.compile(r"^\s*([\d.]+)s\s*$")
+
+T = TypeVar("T")
+
+
+def get_status_code(exception: Exception) -> int | None:
+    """
+    The HTTP status of a failed call, for the error types of the Gemini, OpenAI and Deepgram SDKs and httpx.
+    """
+    response = getattr(exception, "response", None)
+    for status in (
+            getattr(exception, "status_code", None),
+            getattr(exception, "code", None),
+            getattr(exception, "status", None),
+            getattr(response, "status_code", None)
+    ):
+        try:
+            return int(status)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def get_retry_after(exception: Exception) -> float | None:
+    """
+    Seconds the provider asked to wait before the next request: the Retry-After or retry-after-ms headers,
+    or the RetryInfo of a Gemini error. None when the provider did not say.
+    """
+    headers = getattr(getattr(exception, "response", None), "headers", None)
+    if headers is not None:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+            try:
+                return max(email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+            except (TypeError, ValueError):
+                pass
+
+    details = getattr(exception, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []):
+            if not isinstance(detail, dict) or not detail.get("@type", "").endswith("RetryInfo"):
+                continue
+            match = _RETRY_DELAY_RE.match(str(detail.get("retryDelay", "")))
+            if match:
+                return float(match.group(1))
+
+    return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate follows the provider's real quota (AIMD): it starts at initial_rate,
+    every successful call raises it by a small step up to max_rate, every throttled response halves it down to min_rate.
+    Throttled calls are retried after the delay the provider asked for, or after an exponential
+    backoff with jitter. A Retry-After pauses every caller of the limiter, not only the one that got it.
+    Shared by everything calling the same provider and model, use get_rate_limiter.
+    Works from the event loop (call) and from worker threads (call_sync).
+    """
+    def __init__(
+            self,
+            provider: str,
+            model: str,
+            initial_rate: float,
+            max_rate: float | None = None,
+            min_rate: float = 0.1,
+            burst: int = 1,
+            max_retries: int = 10,
+            base_backoff_seconds: float = 1,
+            max_backoff_seconds: float = 60,
+            logger: Logger = logging.getLogger()
+    ):
+        """
+        :param initial_rate: requests per second the limiter starts with.
+        :param max_rate: requests per second the limiter never exceeds, however long calls succeed.
+            Defaults to four times initial_rate.
+        :param min_rate: requests per second the limiter never goes below, however often calls are throttled.
+        :param burst: how many requests may go out at once after a quiet period.
+        """
+        self.__provider = provider
+        self.__model = model
+        self.__max_rate = max(max_rate if max_rate is not None else initial_rate * 4, initial_rate)
+        self.__min_rate = min(min_rate, initial_rate)
+        self.__increase_step = initial_rate / 20
+        self.__burst = max(1, burst)
+        self.__max_retries = max_retries
+        self.__base_backoff_seconds = base_backoff_seconds
+        self.__max_backoff_seconds = max_backoff_seconds
+        self.__logger = logger
+
+        # calls come from the event loop and from worker threads, the lock is only held for bookkeeping
+        self.__lock = threading.Lock()
+        self.__rate = initial_rate
+        self.__tokens = float(self.__burst)
+        self.__updated_at = time.monotonic()
+        self.__paused_until = 0.0
+        self.__last_decrease_at = 0.0
+
+        RATE_LIMIT_RATE_GAUGE.labels(provider=provider, model=model).set(self.__rate)
+
+    @property
+    def rate(self) -> float:
+        return self.__rate
+
+    async def call(self, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs func once a token is available, retrying it while the provider throttles it.
+        """
+        for attempt in range(self.__max_retries + 1):
+            await asyncio.sleep(self.__reserve())
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self.__on_error(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            self.__on_success()
+            return result
+
+    def call_sync(self, func: Callable[[], T]) -> T:
+        """
+        Blocking variant of call, for code running in a worker thread.
+        """
+        for attempt in range(self.__max_retries + 1):
+            time.sleep(self.__reserve())
+            try:
+                result = func()
+            except Exception as e:
+                delay = self.__on_error(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+
+            self.__on_success()
+            return result
+
+    def __reserve(self) -> float:
+        """
+        Takes a token, possibly one that is only refilled in the future. Returns how long to wait for it.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            self.__tokens -= 1
+
+            wait = max(-self.__tokens / self.__rate, self.__paused_until - now, 0)
+
+        if wait > 0:
+            RATE_LIMIT_THROTTLED_SECONDS_COUNTER.labels(provider=self.__provider, model=self.__model).inc(wait)
+        return wait
+
+    def __refill(self, now: float):
+        self.__tokens = min(self.__burst, self.__tokens + (now - self.__updated_at) * self.__rate)
+        self.__updated_at = now
+
+    def __on_success(self):
+        with self.__lock:
+            self.__refill(time.monotonic())
+            self.__set_rate(self.__rate + self.__increase_step)
+
+    def __on_error(self, exception: Exception, attempt: int) -> float | None:
+        """
+        Returns how long to back off before retrying, or None when the error is not retried.
+        """
+        status = get_status_code(exception)
+        if status not in THROTTLING_STATUSES:
+            return None
+
+        RATE_LIMIT_THROTTLED_RESPONSES_COUNTER.labels(
+            provider=self.__provider, model=self.__model, status=str(status)).inc()
+
+        if attempt >= self.__max_retries:
+            self.__logger.info(f"Throttled by {self.__provider} ({status}). Max retry count reached.")
+            return None
+
+        retry_after = get_retry_after(exception)
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            # equal jitter, so callers throttled together do not all come back at the same moment
+            backoff = min(self.__max_backoff_seconds, self.__base_backoff_seconds * 2 ** attempt)
+            delay = backoff / 2 + random.uniform(0, backoff / 2)
+
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            # calls that were already in flight fail together, the rate is only cut once per second
+            if now - self.__last_decrease_at >= 1:
+                self.__last_decrease_at = now
+                self.__set_rate(self.__rate / 2)
+            if retry_after is not None:
+                self.__paused_until = max(self.__paused_until, now + retry_after)
+
+        self.__logger.info(
+            f"Throttled by {self.__provider} ({status}). Retrying in {delay:.1f}s at {self.__rate:.2f} requests/s "
+            f"({attempt + 1} out of {self.__max_retries})")
+        RATE_LIMIT_THROTTLED_SECONDS_COUNTER.labels(provider=self.__provider, model=self.__model).inc(delay)
+        return delay
+
+    def __set_rate(self, rate: float):
+        self.__rate = min(self.__max_rate, max(self.__min_rate, rate))
+        RATE_LIMIT_RATE_GAUGE.labels(provider=self.__provider, model=self.__model).set(self.__rate)
+
+
+_rate_limiters: dict[tuple[str, str], AdaptiveRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+        provider: str,
+        model: str,
+        initial_rate: float,
+        **kwargs) -> AdaptiveRateLimiter:
+    """
+    The limiter of a provider and model, created with the given settings on first use.
+    Every caller of the same provider and model shares it, so together they stay within the quota.
+    """
+    with _rate_limiters_lock:
+        key = (provider, model)
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(provider, model, initial_rate, **kwargs)
+            _rate_limiters[key] = limiter
+        return limiter
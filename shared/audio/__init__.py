@@ -1,7 +1,14 @@
+from .audio_cache import *
 from .audio_splitter import *
 from .download_service import *
+from .encode_profile import *
+from .vad_splitter import *
 
 __all__ = [
+    # pcm - unsafe because there might be services that do not have numpy installed
+    'AudioCache',
     'AudioChunk',
-    'DownloadService'
+    'DownloadService',
+    'EncodeProfile', 'UPLOAD_PROFILES', 'get_upload_profile',
+    'SpeechRegion'
 ]
\ No newline at end of file
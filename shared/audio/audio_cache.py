@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import asynccontextmanager
+from logging import Logger
+from typing import AsyncIterator
+from .download_service import DownloadService
+
+
+class AudioCache:
+    """
+    On-disk cache of downloaded audio, keyed by (video_id, format).
+    Files are evicted least-recently-used first once the cache grows over max_size_bytes.
+    Files that are currently acquired are never evicted.
+    """
+    __TEMP_PREFIX = ".download-"
+
+    def __init__(
+            self,
+            download: DownloadService,
+            cache_dir: str,
+            max_size_bytes: int,
+            logger: Logger = logging.getLogger()
+    ):
+        self.__download = download
+        self.__cache_dir = cache_dir
+        self.__max_size_bytes = max_size_bytes
+        self.__logger = logger
+
+        # single-flight: one lock per key, so concurrent jobs for one video share one download.
+        # A lock is dropped once no job holds or waits for it
+        self.__locks: dict[str, asyncio.Lock] = {}
+        self.__lock_users: dict[str, int] = {}
+        # keys in use, never evicted. Shared with the eviction thread, so only touched under __pins_lock
+        self.__pins: dict[str, int] = {}
+        self.__pins_lock = threading.Lock()
+
+        os.makedirs(self.__cache_dir, exist_ok=True)
+        self.__remove_stale_downloads()
+
+    @asynccontextmanager
+    async def acquire(self, video_id: str, audio_format: str = DownloadService.DEFAULT_FORMAT) -> AsyncIterator[str]:
+        """
+        Yields a path to the cached audio, downloading it first on a miss.
+        The file must not be modified or deleted by the caller.
+        """
+        key = self.__get_key(video_id, audio_format)
+
+        # pinned before looking for the file, so a concurrent eviction cannot remove it in between
+        self.__pin(key)
+        try:
+            async with self.__lock_key(key):
+                path = self.__find(key)
+                if path is not None:
+                    self.__logger.info(f"Audio cache hit for {video_id} ({audio_format})")
+                    os.utime(path)
+                else:
+                    self.__logger.info(f"Audio cache miss for {video_id} ({audio_format})")
+                    path = await asyncio.to_thread(self.__download_to_cache, key, video_id, audio_format)
+
+            await asyncio.to_thread(self.__evict)
+            yield path
+        finally:
+            self.__unpin(key)
+
+    @asynccontextmanager
+    async def __lock_key(self, key: str) -> AsyncIterator[None]:
+        lock = self.__locks.setdefault(key, asyncio.Lock())
+        self.__lock_users[key] = self.__lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self.__lock_users[key] -= 1
+            if self.__lock_users[key] == 0:
+                del self.__lock_users[key]
+                del self.__locks[key]
+
+    def __pin(self, key: str):
+        with self.__pins_lock:
+            self.__pins[key] = self.__pins.get(key, 0) + 1
+
+    def __unpin(self, key: str):
+        with self.__pins_lock:
+            self.__pins[key] -= 1
+            if self.__pins[key] == 0:
+                del self.__pins[key]
+
+    def __get_key(self, video_id: str, audio_format: str) -> str:
+        format_hash = hashlib.sha256(audio_format.encode("utf-8")).hexdigest()[:12]
+        return f"{video_id}-{format_hash}"
+
+    def __find(self, key: str) -> str | None:
+        for name in os.listdir(self.__cache_dir):
+            if os.path.splitext(name)[0] == key:
+                return os.path.join(self.__cache_dir, name)
+        return None
+
+    def __download_to_cache(self, key: str, video_id: str, audio_format: str) -> str:
+        # download into a private directory on the same filesystem, then rename into place,
+        # so a partially downloaded file is never visible under its final name
+        temp_dir = tempfile.mkdtemp(prefix=self.__TEMP_PREFIX, dir=self.__cache_dir)
+        try:
+            downloaded_path = self.__download.download_video_by_id(
+                video_id,
+                output_dir=temp_dir,
+                audio_format=audio_format
+            )
+            extension = os.path.splitext(downloaded_path)[1]
+            path = os.path.join(self.__cache_dir, f"{key}{extension}")
+            os.replace(downloaded_path, path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        return path
+
+    def __evict(self):
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.__cache_dir):
+            path = os.path.join(self.__cache_dir, name)
+            if name.startswith(self.__TEMP_PREFIX) or not os.path.isfile(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.__max_size_bytes:
+                break
+            # checked and removed under the lock, so a file cannot get pinned in between
+            with self.__pins_lock:
+                key = os.path.splitext(os.path.basename(path))[0]
+                if key in self.__pins:
+                    continue
+
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total_size -= size
+            self.__logger.info(f"Evicted {path} from audio cache")
+
+    def __remove_stale_downloads(self):
+        for name in os.listdir(self.__cache_dir):
+            if name.startswith(self.__TEMP_PREFIX):
+                shutil.rmtree(os.path.join(self.__cache_dir, name), ignore_errors=True)
@@ -1,14 +1,17 @@
 import asyncio
+import csv
+import glob
 import json
 import logging
 import os
 import subprocess
 import tempfile
+import uuid
 from dataclasses import dataclass
-import math
 from logging import Logger
 
 from typing import AsyncGenerator
+from .encode_profile import EncodeProfile
 
 
 @dataclass
@@ -97,12 +100,18 @@ async def split_audio(
         file_path,
         segment_length_ms=3 * 60 * 1000,
         use_temp_dir=True,
+        encode_profile: EncodeProfile | None = None,
         logger: Logger = logging.getLogger()
 ) -> AsyncGenerator[AudioChunk, None]:
+    """
+    :param encode_profile: re-encode the chunks in the same ffmpeg run, e.g. to shrink uploads.
+    By default the original codec is copied.
+    """
     if not os.path.exists(file_path):
          raise FileNotFoundError(f"Input file not found: {file_path}")
 
-    filename_without_extension = os.path.splitext(os.path.basename(file_path))[0]
+    # unique per call, so concurrent jobs splitting the same (cached) file don't overwrite each other's chunks
+    filename_without_extension = f"{os.path.splitext(os.path.basename(file_path))[0]}_{uuid.uuid4().hex[:8]}"
     segment_time_seconds = segment_length_ms / 1000.0
 
     out_dir = tempfile.gettempdir() if use_temp_dir else os.path.dirname(file_path)
@@ -112,45 +121,125 @@ async def split_audio(
     total_duration_ms = int(audio_info.duration_ms)
     codec_name = audio_info.codec_name
 
-    extension = get_compatible_extension(codec_name)
-    out_format = extension.extension
+    if encode_profile is not None:
+        out_format = encode_profile.extension
+        codec_args = [
+            '-segment_format', encode_profile.muxer,
+            *encode_profile.ffmpeg_args()
+        ]
+    else:
+        extension = get_compatible_extension(codec_name)
+        out_format = extension.extension
+        codec_args = [
+            '-segment_format', codec_name,
+            '-c:a', 'copy',
+        ] if not extension.is_fallback else []
 
-    output_pattern = os.path.join(out_dir, f"{filename_without_extension}_part%03d.{out_format}")
+    output_prefix = os.path.join(out_dir, f"{filename_without_extension}_part")
+    output_pattern = f"{output_prefix}%03d.{out_format}"
 
+    # the segment muxer appends a "filename,start,end" line to the segment list once a segment is finalized,
+    # so writing the list to stdout lets chunks be handed out while ffmpeg is still working on the rest
     command = [
         'ffmpeg',
+        '-nostdin',
+        '-loglevel', 'error',
         '-i', file_path,
         '-f', 'segment',
         '-segment_time', str(segment_time_seconds),
-        *([
-            '-segment_format', codec_name,
-            '-c:a', 'copy',
-          ] if not extension.is_fallback else []),
+        '-segment_list', 'pipe:1',
+        '-segment_list_type', 'csv',
+        *codec_args,
         '-vn',
         '-reset_timestamps', '1',
         '-map', '0:a:0',
         output_pattern
     ]
 
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stderr_task = asyncio.create_task(process.stderr.read())
+    yielded_paths: set[str] = set()
+
+    try:
+        async for line in process.stdout:
+            entry = line.decode("utf-8").strip()
+            if not entry:
+                continue
+
+            name, start_s, end_s = next(csv.reader([entry]))
+            chunk_path = os.path.join(out_dir, name)
+
+            yielded_paths.add(chunk_path)
+            yield AudioChunk(
+                start_time_ms=int(round(float(start_s) * 1000)),
+                end_time_ms=min(int(round(float(end_s) * 1000)), total_duration_ms),
+                chunk_path=chunk_path
+            )
+
+        return_code = await process.wait()
+        stderr = (await stderr_task).decode("utf-8", errors="replace")
+        if return_code != 0:
+            error_message = ("Error running ffmpeg.\n"
+                             f"Return code: {return_code}\n"
+                             f"Stderr: {stderr}")
+            logger.error(error_message)
+            raise subprocess.CalledProcessError(return_code, command, stderr=stderr)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        if not stderr_task.done():
+            stderr_task.cancel()
+
+        # segments that were written but never handed out (failure or early close) are still ours to remove
+        for leftover_path in glob.glob(f"{glob.escape(output_prefix)}*.{out_format}"):
+            if leftover_path not in yielded_paths:
+                os.remove(leftover_path)
+
+
+async def encode_audio(
+        file_path,
+        encode_profile: EncodeProfile,
+        use_temp_dir=True,
+        logger: Logger = logging.getLogger()
+) -> str:
+    """
+    Re-encodes the whole file with encode_profile, e.g. to shrink an upload of the whole file.
+    Returns the path of the new file, which the caller removes.
+    """
+    if not os.path.exists(file_path):
+         raise FileNotFoundError(f"Input file not found: {file_path}")
+
+    filename_without_extension = f"{os.path.splitext(os.path.basename(file_path))[0]}_{uuid.uuid4().hex[:8]}"
+    out_dir = tempfile.gettempdir() if use_temp_dir else os.path.dirname(file_path)
+    os.makedirs(out_dir, exist_ok=True)
+    output_path = os.path.join(out_dir, f"{filename_without_extension}.{encode_profile.extension}")
+
+    command = [
+        'ffmpeg',
+        '-nostdin',
+        '-loglevel', 'error',
+        '-i', file_path,
+        '-vn',
+        '-map', '0:a:0',
+        *encode_profile.ffmpeg_args(),
+        '-f', encode_profile.muxer,
+        output_path
+    ]
     try:
-        await asyncio.to_thread(subprocess.run, command, check=True, capture_output=True, text=True)
+        await asyncio.to_thread(subprocess.run, command, capture_output=True, text=True, check=True)
     except subprocess.CalledProcessError as e:
         error_message = ("Error running ffmpeg.\n"
                          f"Return code: {e.returncode}\n"
                          f"Stderr: {e.stderr}\n"
                          f"Stdout: {e.stdout}")
         logger.error(error_message)
+        if os.path.exists(output_path):
+            os.remove(output_path)
         raise
 
-    num_segments = math.ceil(total_duration_ms / segment_length_ms)
-    for i in range(num_segments):
-        expected_chunk_path = os.path.join(out_dir, f"{filename_without_extension}_part{i:03d}.{out_format}")
-
-        start_time = i * segment_length_ms
-        end_time = min((i + 1) * segment_length_ms, total_duration_ms)
-
-        yield AudioChunk(
-            start_time_ms=int(start_time),
-            end_time_ms=int(round(end_time)),
-            chunk_path=expected_chunk_path
-        )
+    return output_path
@@ -3,12 +3,14 @@ import os
 from tempfile import gettempdir
 
 class DownloadService:
-    def download_video_by_id(self, video_id, output_dir=gettempdir()):
+    DEFAULT_FORMAT = "bestaudio/best"
+
+    def download_video_by_id(self, video_id, output_dir=gettempdir(), audio_format=DEFAULT_FORMAT):
         url = f"https://www.youtube.com/watch?v={video_id}"
         output_path = os.path.join(output_dir, f"{video_id}.%(ext)s")
 
         ydl_opts = {
-            "format": "bestaudio/best",
+            "format": audio_format,
             "outtmpl": output_path,
             "noprogress": True,
         }
@@ -17,4 +19,4 @@ class DownloadService:
             info = ydl.extract_info(url, download=True)
             downloaded_file_path = ydl.prepare_filename(info)
 
-        return downloaded_file_path
\ No newline at end of file
+        return downloaded_file_path
@@ -0,0 +1,47 @@
+from dataclasses import dataclass, replace
+
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """
+    How chunks are re-encoded while the audio is split, instead of copying the original codec.
+    Speech models work on mono 16 kHz audio, anything more is only more bytes to upload.
+    """
+    codec: str
+    muxer: str
+    extension: str
+    bitrate: str
+    sample_rate: int = 16000
+    channels: int = 1
+
+    def ffmpeg_args(self) -> list[str]:
+        return [
+            '-ac', str(self.channels),
+            '-ar', str(self.sample_rate),
+            '-c:a', self.codec,
+            '-b:a', self.bitrate
+        ]
+
+
+UPLOAD_PROFILES: dict[str, EncodeProfile] = {
+    # ogg rather than .opus, the OpenAI transcription API only accepts known extensions
+    "opus": EncodeProfile(codec="libopus", muxer="ogg", extension="ogg", bitrate="24k"),
+    "mp3": EncodeProfile(codec="libmp3lame", muxer="mp3", extension="mp3", bitrate="32k")
+}
+
+
+def get_upload_profile(name: str, bitrate: str | None = None) -> EncodeProfile | None:
+    """
+    The profile called name ("opus", "mp3"), optionally with a different bitrate.
+    Returns None for "copy", which keeps the original codec.
+    """
+    if name == "copy":
+        return None
+
+    profile = UPLOAD_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown upload profile '{name}', expected one of {', '.join(UPLOAD_PROFILES)} or copy")
+
+    if bitrate:
+        profile = replace(profile, bitrate=bitrate)
+    return profile
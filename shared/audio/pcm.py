@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import math
+import os
+import subprocess
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from logging import Logger
+from typing import AsyncIterator, Iterator
+import numpy as np
+from numpy import ndarray
+from .vad_splitter import SpeechRegion, pad_speech_regions
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+@dataclass
+class PcmChunk:
+    start_time_ms: int
+    end_time_ms: int
+    samples: ndarray
+
+
+@asynccontextmanager
+async def decode_pcm(
+        file_path: str,
+        sample_rate: int = WHISPER_SAMPLE_RATE,
+        logger: Logger = logging.getLogger()
+) -> AsyncIterator[ndarray]:
+    """
+    Decodes the file once into mono float32 PCM and yields it as a memory-mapped array.
+    The backing temp file is removed on exit, so slices must not outlive the context.
+    """
+    if not os.path.exists(file_path):
+         raise FileNotFoundError(f"Input file not found: {file_path}")
+
+    fd, pcm_path = tempfile.mkstemp(suffix=".f32le")
+    os.close(fd)
+
+    command = [
+        'ffmpeg',
+        '-nostdin',
+        '-loglevel', 'error',
+        '-y',
+        '-i', file_path,
+        '-vn',
+        '-map', '0:a:0',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 'f32le',
+        pcm_path
+    ]
+
+    try:
+        try:
+            await asyncio.to_thread(subprocess.run, command, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            error_message = ("Error running ffmpeg.\n"
+                             f"Return code: {e.returncode}\n"
+                             f"Stderr: {e.stderr}\n"
+                             f"Stdout: {e.stdout}")
+            logger.error(error_message)
+            raise
+
+        if os.path.getsize(pcm_path) == 0:
+            yield np.zeros(0, dtype=np.float32)
+            return
+
+        # copy-on-write mapping: models may modify their slice in place without touching the file or each other
+        samples = np.memmap(pcm_path, dtype=np.float32, mode="c")
+        try:
+            yield samples
+        finally:
+            del samples
+    finally:
+        if os.path.exists(pcm_path):
+            os.remove(pcm_path)
+
+
+def split_pcm(
+        samples: ndarray,
+        segment_length_ms: int,
+        sample_rate: int = WHISPER_SAMPLE_RATE
+) -> Iterator[PcmChunk]:
+    """
+    Yields consecutive views into samples, no data is copied.
+    """
+    total_samples = samples.shape[0]
+    segment_samples = max(1, segment_length_ms * sample_rate // 1000)
+
+    for start in range(0, total_samples, segment_samples):
+        end = min(start + segment_samples, total_samples)
+        yield PcmChunk(
+            start_time_ms=start * 1000 // sample_rate,
+            end_time_ms=end * 1000 // sample_rate,
+            samples=samples[start:end]
+        )
+
+
+def split_pcm_regions(
+        samples: ndarray,
+        regions: list[SpeechRegion],
+        sample_rate: int = WHISPER_SAMPLE_RATE
+) -> Iterator[PcmChunk]:
+    """
+    Yields views into samples for the given regions only, e.g. packed speech regions.
+    """
+    for region in regions:
+        start = region.start_time_ms * sample_rate // 1000
+        end = min(region.end_time_ms * sample_rate // 1000, samples.shape[0])
+        if end <= start:
+            continue
+
+        yield PcmChunk(
+            start_time_ms=region.start_time_ms,
+            end_time_ms=region.end_time_ms,
+            samples=samples[start:end]
+        )
+
+
+def detect_speech_pcm(
+        samples: ndarray,
+        sample_rate: int = WHISPER_SAMPLE_RATE,
+        noise_db: float = -35,
+        min_silence_ms: int = 500,
+        padding_ms: int = 200,
+        frame_ms: int = 10) -> list[SpeechRegion]:
+    """
+    detect_speech for audio that is already decoded, without running ffmpeg over the file again.
+    A frame of frame_ms is silent when its peak stays below noise_db,
+    at least min_silence_ms of consecutive silent frames make a silence.
+    """
+    total_samples = samples.shape[0]
+    if total_samples == 0:
+        return []
+
+    total_duration_ms = total_samples * 1000 // sample_rate
+    frame_samples = max(1, frame_ms * sample_rate // 1000)
+    threshold = 10 ** (noise_db / 20)
+
+    # peaks are computed a block at a time, so the whole file is never copied at once
+    block_samples = frame_samples * 6000
+    quiet_blocks = []
+    for start in range(0, total_samples, block_samples):
+        block = samples[start:start + block_samples]
+        padding = -block.shape[0] % frame_samples
+        if padding:
+            block = np.pad(block, (0, padding))
+        quiet_blocks.append(np.abs(block).reshape(-1, frame_samples).max(axis=1) < threshold)
+    quiet = np.concatenate(quiet_blocks)
+
+    edges = np.diff(np.concatenate(([0], quiet.astype(np.int8), [0])))
+    silence_starts = np.flatnonzero(edges == 1)
+    silence_ends = np.flatnonzero(edges == -1)
+    min_silence_frames = max(1, math.ceil(min_silence_ms * sample_rate / (1000 * frame_samples)))
+
+    regions: list[SpeechRegion] = []
+    speech_start_ms = 0
+    for silence_start, silence_end in zip(silence_starts, silence_ends):
+        if silence_end - silence_start < min_silence_frames:
+            continue
+
+        silence_start_ms = int(silence_start) * frame_samples * 1000 // sample_rate
+        if silence_start_ms > speech_start_ms:
+            regions.append(SpeechRegion(speech_start_ms, silence_start_ms))
+        speech_start_ms = min(int(silence_end) * frame_samples * 1000 // sample_rate, total_duration_ms)
+
+    if speech_start_ms < total_duration_ms:
+        regions.append(SpeechRegion(speech_start_ms, total_duration_ms))
+
+    return pad_speech_regions(regions, total_duration_ms, padding_ms)
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import uuid
+from dataclasses import dataclass
+from logging import Logger
+from typing import AsyncGenerator
+from .audio_splitter import AudioChunk, get_audio_info, get_compatible_extension
+from .encode_profile import EncodeProfile
+
+
+@dataclass
+class SpeechRegion:
+    start_time_ms: int
+    end_time_ms: int
+
+
+_SILENCE_START_RE = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+async def detect_speech(
+        file_path: str,
+        total_duration_ms: int,
+        noise_db: float = -35,
+        min_silence_ms: int = 500,
+        padding_ms: int = 200,
+        logger: Logger = logging.getLogger()) -> list[SpeechRegion]:
+    """
+    Energy-based voice activity detection using ffmpeg's silencedetect filter.
+    Everything that is not at least min_silence_ms below noise_db counts as speech.
+    Regions are widened by padding_ms on both sides, so word onsets and tails are not clipped.
+    """
+    command = [
+        'ffmpeg',
+        '-nostdin',
+        '-hide_banner',
+        '-nostats',
+        '-i', file_path,
+        '-vn',
+        '-map', '0:a:0',
+        '-af', f'silencedetect=noise={noise_db}dB:d={min_silence_ms / 1000}',
+        '-f', 'null',
+        '-'
+    ]
+
+    try:
+        result = await asyncio.to_thread(subprocess.run, command, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError as e:
+        error_message = ("Error running ffmpeg.\n"
+                         f"Return code: {e.returncode}\n"
+                         f"Stderr: {e.stderr}\n"
+                         f"Stdout: {e.stdout}")
+        logger.error(error_message)
+        raise
+
+    regions: list[SpeechRegion] = []
+    speech_start_ms: int | None = 0
+    for line in result.stderr.splitlines():
+        silence_start = _SILENCE_START_RE.search(line)
+        if silence_start:
+            silence_start_ms = max(0, int(float(silence_start.group(1)) * 1000))
+            if speech_start_ms is not None and silence_start_ms > speech_start_ms:
+                regions.append(SpeechRegion(speech_start_ms, silence_start_ms))
+            speech_start_ms = None
+            continue
+
+        silence_end = _SILENCE_END_RE.search(line)
+        if silence_end:
+            speech_start_ms = int(float(silence_end.group(1)) * 1000)
+
+    # no silence_end after the last silence_start means the file ends in silence
+    if speech_start_ms is not None and speech_start_ms < total_duration_ms:
+        regions.append(SpeechRegion(speech_start_ms, total_duration_ms))
+
+    return pad_speech_regions(regions, total_duration_ms, padding_ms)
+
+
+def pad_speech_regions(regions: list[SpeechRegion], total_duration_ms: int, padding_ms: int) -> list[SpeechRegion]:
+    """
+    Widens regions by padding_ms on both sides and merges the ones that overlap afterwards.
+    """
+    padded: list[SpeechRegion] = []
+    for region in regions:
+        start = max(0, region.start_time_ms - padding_ms)
+        end = min(total_duration_ms, region.end_time_ms + padding_ms)
+        if padded and start <= padded[-1].end_time_ms:
+            padded[-1].end_time_ms = max(padded[-1].end_time_ms, end)
+        else:
+            padded.append(SpeechRegion(start, end))
+
+    return padded
+
+
+def pack_speech_regions(regions: list[SpeechRegion], segment_length_ms: int) -> list[SpeechRegion]:
+    """
+    Greedily packs consecutive speech regions into segments of at most segment_length_ms.
+    Segments only start and end at silences, except for single regions longer than
+    segment_length_ms, which have to be cut at fixed intervals.
+    """
+    segments: list[SpeechRegion] = []
+    current: SpeechRegion | None = None
+
+    for region in regions:
+        start = region.start_time_ms
+
+        while region.end_time_ms - start > segment_length_ms:
+            if current is not None:
+                segments.append(current)
+                current = None
+            segments.append(SpeechRegion(start, start + segment_length_ms))
+            start += segment_length_ms
+
+        if current is None:
+            current = SpeechRegion(start, region.end_time_ms)
+        elif region.end_time_ms - current.start_time_ms <= segment_length_ms:
+            current.end_time_ms = region.end_time_ms
+        else:
+            segments.append(current)
+            current = SpeechRegion(start, region.end_time_ms)
+
+    if current is not None:
+        segments.append(current)
+
+    return segments
+
+
+async def split_audio_on_silence(
+        file_path,
+        segment_length_ms=3 * 60 * 1000,
+        use_temp_dir=True,
+        noise_db: float = -35,
+        min_silence_ms: int = 500,
+        encode_profile: EncodeProfile | None = None,
+        logger: Logger = logging.getLogger()
+) -> AsyncGenerator[AudioChunk, None]:
+    """
+    Drop-in alternative to split_audio that cuts only at silences and skips non-speech audio entirely.
+    """
+    if not os.path.exists(file_path):
+         raise FileNotFoundError(f"Input file not found: {file_path}")
+
+    filename_without_extension = f"{os.path.splitext(os.path.basename(file_path))[0]}_{uuid.uuid4().hex[:8]}"
+
+    out_dir = tempfile.gettempdir() if use_temp_dir else os.path.dirname(file_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    audio_info = await get_audio_info(file_path, logger)
+    total_duration_ms = int(audio_info.duration_ms)
+
+    if encode_profile is not None:
+        out_format = encode_profile.extension
+        codec_args = encode_profile.ffmpeg_args()
+    else:
+        extension = get_compatible_extension(audio_info.codec_name)
+        out_format = extension.extension
+        codec_args = [
+            '-c:a', 'copy',
+        ] if not extension.is_fallback else []
+
+    regions = await detect_speech(
+        file_path,
+        total_duration_ms,
+        noise_db=noise_db,
+        min_silence_ms=min_silence_ms,
+        logger=logger)
+    segments = pack_speech_regions(regions, segment_length_ms)
+
+    speech_ms = sum(segment.end_time_ms - segment.start_time_ms for segment in segments)
+    logger.info(f"Detected {speech_ms} ms of speech out of {total_duration_ms} ms in {len(segments)} segments")
+
+    for i, segment in enumerate(segments):
+        chunk_path = os.path.join(out_dir, f"{filename_without_extension}_part{i:03d}.{out_format}")
+
+        command = [
+            'ffmpeg',
+            '-nostdin',
+            '-loglevel', 'error',
+            '-ss', str(segment.start_time_ms / 1000),
+            '-i', file_path,
+            '-t', str((segment.end_time_ms - segment.start_time_ms) / 1000),
+            '-vn',
+            '-map', '0:a:0',
+            *codec_args,
+            chunk_path
+        ]
+
+        try:
+            await asyncio.to_thread(subprocess.run, command, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            error_message = ("Error running ffmpeg.\n"
+                             f"Return code: {e.returncode}\n"
+                             f"Stderr: {e.stderr}\n"
+                             f"Stdout: {e.stdout}")
+            logger.error(error_message)
+            if os.path.exists(chunk_path):
+                os.remove(chunk_path)
+            raise
+
+        yield AudioChunk(
+            start_time_ms=segment.start_time_ms,
+            end_time_ms=segment.end_time_ms,
+            chunk_path=chunk_path
+        )
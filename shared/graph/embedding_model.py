@@ -11,6 +11,13 @@ class EmbeddingModel(Protocol):
     def unload(self):
         pass
 
+    def warm_up(self):
+        """
+        Loads the model and runs a throwaway inference, so the first real request doesn't pay for either.
+        Called from a worker thread.
+        """
+        self.ensure_loaded()
+
     @abstractmethod
     def embed(self, entities: list[str]) -> ndarray:
         pass
\ No newline at end of file
@@ -1,18 +1,42 @@
+from .batching_language_model import *
+from .cached_language_model import *
+from .entity_merger import *
 from .entity_relations import *
+from .incremental_json import *
 from .language_model import *
 from .language_service import *
+from .structured_output import *
+from .token_estimator import *
 from .topics_schema import *
 
 __all__ = [
+    #batching_language_model
+    'BatchingLanguageModel',
+
+    #cached_language_model
+    'LanguageResponseCache', 'CachedLanguageModel', 'bypass_language_cache',
+
+    #entity_merger
+    'EntityMerger', 'normalize_entity_name',
+
     #entity_relations
     'Entity', 'Relationship', 'EntityRelations', 'EntitySchema', 'RelationshipSchema', 'EntityRelationsSchema',
 
+    #incremental_json
+    'JsonStreamError', 'IncrementalJsonValidator',
+
     #language_model
     'TextMessage', 'FileMessage', 'LanguageModel',
 
     #language_service
     'ChunkSummaryResponse', 'LanguageService',
 
+    #structured_output
+    'StructuredOutput', 'StructuredOutputError', 'repair_json',
+
+    #token_estimator
+    'estimate_tokens',
+
     #topics_schema
     'TopicSchema', 'TopicExtractionSchema', 'TagMapping', 'MacroTagMappingSchema',
 ]
\ No newline at end of file
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from logging import Logger
+from typing import AsyncIterator
+from pydantic import BaseModel
+from .language_model import LanguageModel, TextMessage, FileMessage
+
+
+@dataclass
+class _ChatRequest:
+    messages: list[TextMessage | FileMessage]
+    system_prompt: str | None
+    schema: type[BaseModel] | None
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class BatchingLanguageModel(LanguageModel):
+    """
+    Collects chat calls from all concurrent jobs of the worker and submits them together,
+    at most max_parallel at a time, so a server with several parallel slots (OLLAMA_NUM_PARALLEL)
+    processes them in one batch instead of one after another.
+    Calls wait up to batch_window_ms for others to join a batch. At most max_queued calls
+    wait for a slot, further callers block until there is room.
+    """
+    def __init__(
+            self,
+            model: LanguageModel,
+            max_parallel: int,
+            max_queued: int = 64,
+            batch_window_ms: int = 20,
+            logger: Logger = logging.getLogger()
+    ):
+        self.__model = model
+        self.__max_parallel = max(1, max_parallel)
+        self.__batch_window_s = batch_window_ms / 1000
+        self.__logger = logger
+        self.__queue: asyncio.Queue[_ChatRequest] = asyncio.Queue(maxsize=max(1, max_queued))
+        self.__slots = asyncio.Semaphore(self.__max_parallel)
+        self.__dispatcher: asyncio.Task | None = None
+        self.__running: set[asyncio.Task] = set()
+
+    async def chat(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None = None,
+            schema: type[BaseModel] | None = None
+    ) -> str:
+        if self.__dispatcher is None or self.__dispatcher.done():
+            self.__dispatcher = asyncio.create_task(self.__dispatch())
+
+        request = _ChatRequest(messages, system_prompt, schema)
+        await self.__queue.put(request)
+        return await request.future
+
+    async def chat_stream(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None = None,
+            schema: type[BaseModel] | None = None
+    ) -> AsyncIterator[str]:
+        # streams are not batched, but still take one of the server's parallel slots
+        async with self.__slots:
+            stream = self.__model.chat_stream(messages, system_prompt=system_prompt, schema=schema)
+            try:
+                async for part in stream:
+                    yield part
+            finally:
+                await stream.aclose()
+
+    async def __dispatch(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # waiting for a call first, so an idle dispatcher doesn't keep a slot from the streams
+            request = await self.__queue.get()
+            await self.__slots.acquire()
+            batch = [request]
+
+            deadline = loop.time() + self.__batch_window_s
+            while len(batch) < self.__max_parallel:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self.__queue.get(), timeout)
+                except TimeoutError:
+                    break
+
+                await self.__slots.acquire()
+                batch.append(request)
+
+            if len(batch) > 1:
+                self.__logger.info(f"Submitting {len(batch)} chat calls together")
+
+            for request in batch:
+                task = asyncio.create_task(self.__run(request))
+                self.__running.add(task)
+                task.add_done_callback(self.__running.discard)
+
+    async def __run(self, request: _ChatRequest):
+        try:
+            # the caller may have given up while waiting in the queue
+            if request.future.cancelled():
+                return
+
+            response = await self.__model.chat(
+                request.messages,
+                system_prompt=request.system_prompt,
+                schema=request.schema
+            )
+            if not request.future.cancelled():
+                request.future.set_result(response)
+        except Exception as e:
+            if not request.future.cancelled():
+                request.future.set_exception(e)
+        finally:
+            self.__slots.release()
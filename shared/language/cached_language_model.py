@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import Logger
+from typing import AsyncIterator, Iterator
+from prometheus_client import Counter
+from pydantic import BaseModel, ValidationError
+from .language_model import LanguageModel, TextMessage, FileMessage
+
+LANGUAGE_CACHE_HITS_COUNTER = Counter(
+    'nvideo_language_cache_hits',
+    'Number of chat calls answered from the response cache',
+    ['model']
+)
+LANGUAGE_CACHE_MISSES_COUNTER = Counter(
+    'nvideo_language_cache_misses',
+    'Number of chat calls that went to the model',
+    ['model']
+)
+
+_bypass_cache: ContextVar[bool] = ContextVar("bypass_language_cache", default=False)
+
+
+@contextmanager
+def bypass_language_cache() -> Iterator[None]:
+    """
+    Chat calls made inside this block skip the cache lookup. Their responses are still stored.
+    """
+    token = _bypass_cache.set(True)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+class LanguageResponseCache:
+    """
+    SQLite-backed store of chat responses, shared by every CachedLanguageModel of the worker.
+    Entries expire after ttl_seconds, the least recently used ones are evicted above max_entries.
+    Zero disables either limit. Expired and evicted entries are removed at most every prune_interval_seconds.
+    """
+    def __init__(
+            self,
+            path: str,
+            ttl_seconds: float = 0,
+            max_entries: int = 0,
+            prune_interval_seconds: float = 60,
+            logger: Logger = logging.getLogger()
+    ):
+        self.__ttl_seconds = ttl_seconds
+        self.__max_entries = max_entries
+        self.__prune_interval_seconds = prune_interval_seconds
+        self.__pruned_at = 0.0
+        self.__logger = logger
+        # sqlite3 connections are not thread-safe, but every call runs in a worker thread
+        self.__lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, "
+            "response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "last_used_at REAL NOT NULL)"
+        )
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_last_used_at ON responses (last_used_at)")
+        self.__connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_created_at ON responses (created_at)")
+
+    async def get(self, key: str) -> str | None:
+        return await asyncio.to_thread(self.__get, key)
+
+    async def put(self, key: str, response: str):
+        await asyncio.to_thread(self.__put, key, response)
+
+    def __get(self, key: str) -> str | None:
+        now = time.time()
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if self.__ttl_seconds > 0 and now - created_at > self.__ttl_seconds:
+                self.__connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+
+            self.__connection.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+            return response
+
+    def __put(self, key: str, response: str):
+        now = time.time()
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now))
+
+            if now - self.__pruned_at < self.__prune_interval_seconds:
+                return
+            self.__pruned_at = now
+
+            if self.__ttl_seconds > 0:
+                self.__connection.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (now - self.__ttl_seconds,))
+
+            if self.__max_entries > 0:
+                self.__connection.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.__max_entries,))
+
+
+class CachedLanguageModel(LanguageModel):
+    """
+    Answers repeated chat calls from a LanguageResponseCache instead of the wrapped model.
+    The key is a hash of the model name, system prompt, messages (file contents included) and schema.
+    When a schema is requested, responses that do not validate against it are not stored, so retries reach the model.
+    """
+    def __init__(
+            self,
+            model: LanguageModel,
+            model_name: str,
+            cache: LanguageResponseCache,
+            logger: Logger = logging.getLogger()
+    ):
+        self.__model = model
+        self.__model_name = model_name
+        self.__cache = cache
+        self.__logger = logger
+
+    async def chat(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None = None,
+            schema: type[BaseModel] | None = None
+    ) -> str:
+        key = await self.__create_key(messages, system_prompt, schema)
+
+        if not _bypass_cache.get():
+            cached = await self.__cache.get(key)
+            if cached is not None:
+                LANGUAGE_CACHE_HITS_COUNTER.labels(model=self.__model_name).inc()
+                return cached
+
+        LANGUAGE_CACHE_MISSES_COUNTER.labels(model=self.__model_name).inc()
+
+        response = await self.__model.chat(messages, system_prompt=system_prompt, schema=schema)
+
+        if response is not None and self.__is_cacheable(response, schema):
+            await self.__cache.put(key, response)
+
+        return response
+
+    async def chat_stream(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None = None,
+            schema: type[BaseModel] | None = None
+    ) -> AsyncIterator[str]:
+        key = await self.__create_key(messages, system_prompt, schema)
+
+        if not _bypass_cache.get():
+            cached = await self.__cache.get(key)
+            if cached is not None:
+                LANGUAGE_CACHE_HITS_COUNTER.labels(model=self.__model_name).inc()
+                yield cached
+                return
+
+        LANGUAGE_CACHE_MISSES_COUNTER.labels(model=self.__model_name).inc()
+
+        parts: list[str] = []
+        stream = self.__model.chat_stream(messages, system_prompt=system_prompt, schema=schema)
+        try:
+            async for part in stream:
+                parts.append(part)
+                yield part
+        finally:
+            await stream.aclose()
+
+        # only reached when the whole response was read, aborted generations are not stored
+        response = "".join(parts)
+        if self.__is_cacheable(response, schema):
+            await self.__cache.put(key, response)
+
+    async def __create_key(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None,
+            schema: type[BaseModel] | None) -> str:
+        hashed_messages = []
+        for message in messages:
+            if isinstance(message, TextMessage):
+                hashed_messages.append({"text": message.text})
+            elif isinstance(message, FileMessage):
+                hashed_messages.append({"file": await asyncio.to_thread(self.__hash_file, message.file_path)})
+
+        content = json.dumps({
+            "model": self.__model_name,
+            "system_prompt": system_prompt,
+            "messages": hashed_messages,
+            "schema": schema.model_json_schema() if schema else None
+        }, sort_keys=True, ensure_ascii=False)
+
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def __hash_file(self, file_path: str) -> str:
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def __is_cacheable(self, response: str, schema: type[BaseModel] | None) -> bool:
+        if schema is None:
+            return True
+
+        try:
+            schema.model_validate_json(response)
+            return True
+        except ValidationError:
+            self.__logger.info(f"Not caching a response that does not match {schema.__name__}")
+            return False
@@ -0,0 +1,143 @@
+import math
+import unicodedata
+from collections import Counter
+from typing import Awaitable, Callable
+from .entity_relations import EntityRelations, Entity, Relationship
+
+
+def normalize_entity_name(name: str) -> str:
+    """
+    Casefolds, drops punctuation and collapses whitespace, so "The U.S.", "the US" and "The  US" compare equal.
+    """
+    name = unicodedata.normalize("NFKC", name).casefold()
+    name = "".join(
+        character for character in name
+        if not unicodedata.category(character).startswith("P")
+    )
+    return " ".join(name.split())
+
+
+class EntityMerger:
+    """
+    Merges entity-relations extracted from chunks independently of each other into one graph.
+    Entities with the same normalized name, or optionally with similar embeddings, become one entity.
+    Relationship endpoints are rewritten to the canonical names. The result only depends on the input order.
+    """
+    def __init__(
+            self,
+            embed: Callable[[list[str]], Awaitable[list[list[float]]]] | None = None,
+            similarity_threshold: float = 0.9
+    ):
+        """
+        :param embed: embeds a list of names, enables merging of entities with different spellings.
+        :param similarity_threshold: cosine similarity above which two names are the same entity.
+        """
+        self.__embed = embed
+        self.__similarity_threshold = similarity_threshold
+
+    async def merge(self, chunk_entity_relations: list[EntityRelations]) -> EntityRelations:
+        # normalized key -> spellings in order of appearance, and where the key first appeared
+        spellings: dict[str, list[str]] = {}
+        first_entities: dict[str, Entity] = {}
+
+        for entity_relations in chunk_entity_relations:
+            for entity in entity_relations.entities:
+                self.__add_mention(spellings, first_entities, entity.name, entity)
+            for rel in entity_relations.relationships:
+                for name in (rel.source_entity, rel.target_entity):
+                    self.__add_mention(spellings, first_entities, name, Entity(
+                        name=name,
+                        chunk_start_time_ms=rel.chunk_start_time_ms,
+                        chunk_end_time_ms=rel.chunk_end_time_ms
+                    ))
+
+        keys = [key for key in spellings if key]
+        key_to_root = await self.__group_similar(keys)
+
+        # the most frequent spelling within a group wins, ties go to the one seen first
+        group_spellings: dict[str, list[str]] = {}
+        for key in keys:
+            group_spellings.setdefault(key_to_root[key], []).extend(spellings[key])
+        canonical_names: dict[str, str] = {}
+        for root, names in group_spellings.items():
+            counts = Counter(names)
+            canonical_names[root] = max(counts, key=lambda name: (counts[name], -names.index(name)))
+
+        entities: list[Entity] = []
+        for key in keys:
+            root = key_to_root[key]
+            if key != root:
+                continue
+
+            first = first_entities[key]
+            entities.append(Entity(
+                name=canonical_names[root],
+                chunk_start_time_ms=first.chunk_start_time_ms,
+                chunk_end_time_ms=first.chunk_end_time_ms
+            ))
+
+        relationships: list[Relationship] = []
+        seen_relationships = set()
+        for entity_relations in chunk_entity_relations:
+            for rel in entity_relations.relationships:
+                source_key = normalize_entity_name(rel.source_entity)
+                target_key = normalize_entity_name(rel.target_entity)
+                if not source_key or not target_key:
+                    continue
+
+                source = canonical_names[key_to_root[source_key]]
+                target = canonical_names[key_to_root[target_key]]
+                # both ends merged into the same entity, nothing left to relate
+                if source == target:
+                    continue
+
+                identity = (source, target, normalize_entity_name(rel.relation_description))
+                if identity in seen_relationships:
+                    continue
+                seen_relationships.add(identity)
+
+                relationships.append(Relationship(
+                    source_entity=source,
+                    target_entity=target,
+                    relation_description=rel.relation_description,
+                    chunk_start_time_ms=rel.chunk_start_time_ms,
+                    chunk_end_time_ms=rel.chunk_end_time_ms
+                ))
+
+        return EntityRelations(entities=entities, relationships=relationships)
+
+    def __add_mention(
+            self,
+            spellings: dict[str, list[str]],
+            first_entities: dict[str, Entity],
+            name: str,
+            entity: Entity):
+        key = normalize_entity_name(name)
+        spellings.setdefault(key, []).append(name.strip())
+        first_entities.setdefault(key, entity)
+
+    async def __group_similar(self, keys: list[str]) -> dict[str, str]:
+        """
+        Maps every key to the first key of its group. Without embeddings every key is its own group.
+        """
+        key_to_root = {key: key for key in keys}
+        if self.__embed is None or len(keys) < 2:
+            return key_to_root
+
+        vectors = [self.__normalize_vector(vector) for vector in await self.__embed(keys)]
+        roots: list[int] = []
+
+        for i, vector in enumerate(vectors):
+            for root in roots:
+                similarity = sum(a * b for a, b in zip(vector, vectors[root]))
+                if similarity >= self.__similarity_threshold:
+                    key_to_root[keys[i]] = keys[root]
+                    break
+            else:
+                roots.append(i)
+
+        return key_to_root
+
+    def __normalize_vector(self, vector: list[float]) -> list[float]:
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
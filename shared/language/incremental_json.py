@@ -0,0 +1,195 @@
+from pydantic import BaseModel
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARACTERS = "0123456789+-.eE"
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+
+
+class JsonStreamError(ValueError):
+    """
+    The streamed text can no longer become a valid JSON document of the expected schema.
+    """
+
+
+class IncrementalJsonValidator:
+    """
+    Checks streamed model output one piece at a time, so a generation can be aborted
+    as soon as it goes wrong instead of after the last token.
+    Validates JSON syntax and, when a schema is given, that the document is an object
+    whose top-level keys are fields of the schema. A leading markdown code fence is skipped.
+    """
+    def __init__(self, schema: type[BaseModel] | None = None):
+        self.__allowed_keys: set[str] | None = None
+        if schema is not None:
+            self.__allowed_keys = {
+                field.alias or name
+                for name, field in schema.model_fields.items()
+            }
+
+        self.__text: list[str] = []
+        self.__in_fence = False
+        self.__stack: list[str] = []
+        self.__state = "value"
+        self.__allow_close = False
+        self.__literal = ""
+        self.__escape = False
+        self.__key: list[str] = []
+        self.__started = False
+        self.__complete = False
+
+    @property
+    def text(self) -> str:
+        """
+        The JSON document read so far, without the code fence and anything after the document.
+        """
+        return "".join(self.__text)
+
+    @property
+    def complete(self) -> bool:
+        return self.__complete
+
+    def feed(self, part: str) -> bool:
+        """
+        Consumes the next piece of output. Returns True once the document is complete.
+        Raises JsonStreamError as soon as the output cannot match anymore.
+        """
+        for character in part:
+            if self.__complete:
+                break
+            if not self.__started and self.__skip_fence(character):
+                continue
+
+            # a bare top-level number only ends with the character after it, which is not part of the document
+            was_top_level_number = self.__state == "number" and not self.__stack
+            self.__consume(character)
+            if self.__started and not (was_top_level_number and self.__complete):
+                self.__text.append(character)
+
+        return self.__complete
+
+    def __skip_fence(self, character: str) -> bool:
+        if self.__in_fence:
+            # inside the opening fence line, e.g. ```json
+            if character == "\n":
+                self.__in_fence = False
+            return True
+
+        if character == "`":
+            self.__in_fence = True
+            return True
+
+        return False
+
+    def __consume(self, character: str):
+        match self.__state:
+            case "string" | "key_string":
+                self.__consume_string(character)
+            case "number":
+                if character in _NUMBER_CHARACTERS:
+                    return
+                self.__end_value()
+                # a top-level number only ends with the character after it, which is not part of the document
+                if not self.__complete:
+                    self.__consume(character)
+            case "literal":
+                if not self.__literal or character != self.__literal[0]:
+                    raise JsonStreamError(f"Unexpected {character!r} in a literal")
+                self.__literal = self.__literal[1:]
+                if not self.__literal:
+                    self.__end_value()
+            case "value":
+                self.__consume_value(character)
+            case "key":
+                if character in _WHITESPACE:
+                    return
+                if character == '"':
+                    self.__key = []
+                    self.__state = "key_string"
+                elif character == "}" and self.__allow_close:
+                    self.__close("{")
+                else:
+                    raise JsonStreamError(f"Expected a key, got {character!r}")
+            case "colon":
+                if character in _WHITESPACE:
+                    return
+                if character != ":":
+                    raise JsonStreamError(f"Expected ':', got {character!r}")
+                self.__state = "value"
+                self.__allow_close = False
+            case "after":
+                if character in _WHITESPACE:
+                    return
+                if character == ",":
+                    self.__state = "key" if self.__stack[-1] == "{" else "value"
+                    self.__allow_close = False
+                elif character in "}]":
+                    self.__close("{" if character == "}" else "[")
+                else:
+                    raise JsonStreamError(f"Expected ',' or a closing bracket, got {character!r}")
+
+    def __consume_value(self, character: str):
+        if character in _WHITESPACE:
+            return
+
+        if not self.__stack:
+            if self.__allowed_keys is not None and character != "{":
+                raise JsonStreamError(f"Expected an object, got {character!r}")
+            self.__started = True
+
+        if character == "{":
+            self.__stack.append("{")
+            self.__state = "key"
+            self.__allow_close = True
+        elif character == "[":
+            self.__stack.append("[")
+            self.__state = "value"
+            self.__allow_close = True
+        elif character == "]" and self.__allow_close and self.__stack and self.__stack[-1] == "[":
+            self.__close("[")
+        elif character == '"':
+            self.__state = "string"
+        elif character in _NUMBER_CHARACTERS:
+            self.__state = "number"
+        elif character in _LITERALS:
+            self.__literal = _LITERALS[character][1:]
+            self.__state = "literal"
+        else:
+            raise JsonStreamError(f"Expected a value, got {character!r}")
+
+    def __consume_string(self, character: str):
+        is_key = self.__state == "key_string"
+
+        if self.__escape:
+            self.__escape = False
+        elif character == "\\":
+            self.__escape = True
+        elif character == '"':
+            if is_key:
+                self.__check_key("".join(self.__key))
+                self.__state = "colon"
+            else:
+                self.__end_value()
+            return
+        elif character in "\r\n":
+            raise JsonStreamError("Unescaped line break in a string")
+
+        if is_key:
+            self.__key.append(character)
+
+    def __check_key(self, key: str):
+        if self.__allowed_keys is None or len(self.__stack) != 1:
+            return
+        if key not in self.__allowed_keys:
+            raise JsonStreamError(f"Unexpected key {key!r}")
+
+    def __close(self, opening: str):
+        if not self.__stack or self.__stack[-1] != opening:
+            raise JsonStreamError("Mismatched closing bracket")
+        self.__stack.pop()
+        self.__end_value()
+
+    def __end_value(self):
+        if self.__stack:
+            self.__state = "after"
+        else:
+            self.__complete = True
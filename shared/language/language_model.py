@@ -1,6 +1,6 @@
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import Protocol
+from typing import AsyncIterator, Protocol
 from pydantic import BaseModel
 
 
@@ -21,3 +21,16 @@ class LanguageModel(Protocol):
             schema: type[BaseModel] | None = None
     ):
         raise NotImplementedError
+
+    async def chat_stream(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None = None,
+            schema: type[BaseModel] | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Same as chat, but yields the response in pieces as they are generated.
+        Closing the iterator early aborts the generation.
+        Yields the whole response at once unless the model overrides it.
+        """
+        yield await self.chat(messages, system_prompt=system_prompt, schema=schema)
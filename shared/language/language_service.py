@@ -1,13 +1,24 @@
+import asyncio
 import json
+import re
+from collections import Counter
 from dataclasses import dataclass
-from json import JSONDecodeError
 from logging import Logger
+from typing import Awaitable, Callable, TypeVar
+from .entity_merger import EntityMerger
 from .entity_relations import EntityRelations, Entity, Relationship, EntityRelationsSchema
 from .language_model import LanguageModel, TextMessage
+from .structured_output import StructuredOutput, StructuredOutputError
+from .token_estimator import estimate_tokens
 from shared.models import *
 from .topics_schema import TopicExtractionSchema, MacroTagMappingSchema
 from shared.models.topics import TopicResult
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?…。！？])\s+")
+
 @dataclass
 class ChunkSummaryResponse:
     text: str
@@ -26,8 +37,36 @@ class LanguageService:
             tag_normalization_system_prompt: str,
             social_post_system_prompt: str,
             tiktok_scenario_system_prompt: str,
-            empty_chunk_threshold_ms: int
+            empty_chunk_threshold_ms: int,
+            concurrency_limiter: asyncio.Semaphore | None = None,
+            overall_summary_token_budget: int = 0,
+            overall_summary_fan_in: int = 8,
+            compact_entity_context: bool = False,
+            entity_context_limit: int = 200,
+            parallel_entity_extraction: bool = False,
+            entity_merger: EntityMerger | None = None,
+            topic_window_tokens: int = 0,
+            topic_window_overlap_tokens: int = 0,
+            stream_json: bool = False
     ):
+        """
+        :param concurrency_limiter: shared by every LanguageService of the worker, bounds the number of
+        independent model calls in flight. Without it, independent calls run one after another.
+        :param overall_summary_token_budget: above this many estimated tokens, chunk summaries are
+        reduced in a tree instead of a single call. Zero always uses a single call.
+        :param overall_summary_fan_in: at most this many summaries are reduced by one call.
+        :param compact_entity_context: send only the names of known entities to entity extraction,
+        at most entity_context_limit of them, most mentioned and most recent first,
+        instead of every entity and relationship extracted so far.
+        :param parallel_entity_extraction: extract every chunk concurrently without any existing context,
+        then merge the results with entity_merger.
+        :param topic_window_tokens: longer transcripts are split into windows of about this many tokens
+        for topic extraction. Zero always sends the whole transcript in one call.
+        :param topic_window_overlap_tokens: how much of the previous window is repeated at the start of the next one,
+        so topics crossing a window border are seen whole at least once.
+        :param stream_json: stream JSON responses and abort a generation
+        as soon as it stops being valid JSON of the schema, instead of after it finishes.
+        """
         self.__logger = logger
         self.__model = model
         self.__summary_system_prompt = summary_system_prompt
@@ -38,70 +77,91 @@ class LanguageService:
         self.__social_post_system_prompt = social_post_system_prompt
         self.__tiktok_scenario_system_prompt = tiktok_scenario_system_prompt
         self.__empty_chunk_threshold_ms = empty_chunk_threshold_ms
+        self.__concurrency_limiter = concurrency_limiter
+        self.__overall_summary_token_budget = overall_summary_token_budget
+        self.__overall_summary_fan_in = max(2, overall_summary_fan_in)
+        self.__compact_entity_context = compact_entity_context
+        self.__entity_context_limit = entity_context_limit
+        self.__parallel_entity_extraction = parallel_entity_extraction
+        self.__entity_merger = entity_merger or EntityMerger()
+        self.__topic_window_tokens = topic_window_tokens
+        self.__topic_window_overlap_tokens = topic_window_overlap_tokens
+        self.__structured_output = StructuredOutput(model, logger, stream=stream_json)
 
     async def summarize(self, chunks: list[TranscriptionChunkResult]) -> list[ChunkSummaryResponse]:
-        summaries: list[ChunkSummaryResponse] = []
+        threshold = self.__empty_chunk_threshold_ms
+        chunks = [chunk for chunk in chunks if chunk.end_time_ms - chunk.start_time_ms >= threshold]
 
-        for chunk in chunks:
-            threshold = self.__empty_chunk_threshold_ms
-            if chunk.end_time_ms - chunk.start_time_ms < threshold:
-                continue
+        summaries = await self.__map_bounded(self.__summarize_chunk, chunks)
 
-            summary = await self.__summarize_chunk(chunk)
-            summaries.append(ChunkSummaryResponse(
+        return [
+            ChunkSummaryResponse(
                 text=summary,
                 start_time_ms=chunk.start_time_ms,
                 end_time_ms=chunk.end_time_ms
-            ))
-            self.__logger.info(
-                f"Summarized chunk at {chunk.start_time_ms}, summary length: {len(summary)}")
-
-        return summaries
+            )
+            for chunk, summary in zip(chunks, summaries, strict=True)
+        ]
 
     async def generate_overall_summary(self, chunk_summaries: list[ChunkSummaryResponse]) -> str:
-        summaries = ""
-
-        for chunk in chunk_summaries:
-            summaries += self.__create_chunk_message(
-                chunk.text,
-                chunk.start_time_ms,
-                chunk.end_time_ms) + "\n\n\n"
-
-        response = await self.__model.chat(
-            messages=[
-                TextMessage(summaries)
-            ],
-            system_prompt=self.__overall_summary_system_prompt
-        )
+        if self.__overall_summary_token_budget <= 0:
+            return await self.__reduce_summaries(chunk_summaries)
+
+        level = 0
+        while True:
+            batches = self.__pack_summaries(chunk_summaries)
+            # no summaries at all (every chunk was empty) packs into no batch
+            if len(batches) <= 1:
+                return await self.__reduce_summaries(batches[0] if batches else chunk_summaries)
+
+            reduced = await self.__map_bounded(self.__reduce_summaries, batches)
+            chunk_summaries = [
+                ChunkSummaryResponse(
+                    text=summary,
+                    start_time_ms=batch[0].start_time_ms,
+                    end_time_ms=batch[-1].end_time_ms
+                )
+                for batch, summary in zip(batches, reduced, strict=True)
+            ]
 
-        return response
+            level += 1
+            self.__logger.info(f"Reduced overall summary level {level} to {len(chunk_summaries)} summaries")
 
 
     async def generate_entity_relations(self, chunks: list[TranscriptionChunkResult]) -> EntityRelations:
+        if self.__parallel_entity_extraction:
+            return await self.__generate_entity_relations_parallel(chunks)
+
         entities: list[Entity] = []
         relationships: list[Relationship] = []
         entity_names_set = set()
+        # how often and in which chunk each entity was last mentioned, only tracked to rank the compact context
+        mentions: Counter[str] = Counter()
+        last_seen: dict[str, int] = {}
 
-        for chunk in chunks:
+        for i, chunk in enumerate(chunks):
             threshold = self.__empty_chunk_threshold_ms
             if chunk.end_time_ms - chunk.start_time_ms < threshold:
                 continue
 
-            entity_relations_chunk = await self.__extract_entity_relations_chunk(
-                chunk=chunk,
-                existing_entity_relations=EntityRelations(
+            if self.__compact_entity_context:
+                existing_context = self.__create_compact_entity_context(mentions, last_seen)
+            else:
+                existing_context = EntityRelations(
                     entities=entities,
                     relationships=relationships
-                )
+                ).model_dump_json(indent=2)
+
+            entity_relations_chunk = await self.__extract_entity_relations_chunk(
+                chunk=chunk,
+                existing_context=existing_context
             )
 
-            new_entities = []
             for entity in entity_relations_chunk.entities:
                 if entity.name not in entity_names_set:
                     entity_names_set.add(entity.name)
-                    new_entities.append(entity)
+                    entities.append(entity)
 
-            entities.extend(new_entities)
             relationships.extend(entity_relations_chunk.relationships)
 
             self.__logger.info(
@@ -110,53 +170,65 @@ class LanguageService:
                 f"chunk at {chunk.start_time_ms}"
             )
 
-            for rel in relationships:
-                entity_name: str | None = None
-                if rel.source_entity not in entity_names_set:
-                    entity_name = rel.source_entity
-                if rel.target_entity not in entity_names_set:
-                    entity_name = rel.target_entity
+            if self.__compact_entity_context:
+                self.__count_mentions(entity_relations_chunk, i, mentions, last_seen)
 
-                if entity_name is None:
-                    continue
+            # only this chunk's relationships can point at entities that are not known yet
+            for rel in entity_relations_chunk.relationships:
+                for entity_name in (rel.source_entity, rel.target_entity):
+                    if entity_name in entity_names_set:
+                        continue
 
-                entity = Entity(
-                    name=entity_name,
-                    chunk_start_time_ms=chunk.start_time_ms,
-                    chunk_end_time_ms=chunk.end_time_ms
-                )
-                entity_names_set.add(entity.name)
-                entities.append(entity)
+                    entity_names_set.add(entity_name)
+                    entities.append(Entity(
+                        name=entity_name,
+                        chunk_start_time_ms=chunk.start_time_ms,
+                        chunk_end_time_ms=chunk.end_time_ms
+                    ))
 
         return EntityRelations(entities=entities, relationships=relationships)
 
+    async def __generate_entity_relations_parallel(
+            self,
+            chunks: list[TranscriptionChunkResult]
+    ) -> EntityRelations:
+        threshold = self.__empty_chunk_threshold_ms
+        chunks = [chunk for chunk in chunks if chunk.end_time_ms - chunk.start_time_ms >= threshold]
+
+        empty_context = EntityRelations(entities=[], relationships=[]).model_dump_json(indent=2)
+
+        async def extract(chunk: TranscriptionChunkResult) -> EntityRelations:
+            entity_relations_chunk = await self.__extract_entity_relations_chunk(
+                chunk=chunk,
+                existing_context=empty_context
+            )
+            self.__logger.info(
+                f"Extracted {len(entity_relations_chunk.entities)} entities and "
+                f"{len(entity_relations_chunk.relationships)} relationships from "
+                f"chunk at {chunk.start_time_ms}"
+            )
+            return entity_relations_chunk
+
+        chunk_entity_relations = await self.__map_bounded(extract, chunks)
+
+        merged = await self.__entity_merger.merge(chunk_entity_relations)
+        self.__logger.info(
+            f"Merged {sum(len(result.entities) for result in chunk_entity_relations)} extracted entities "
+            f"into {len(merged.entities)}")
+
+        return merged
+
     async def extract_topics(self, chunks: list[TranscriptionChunkResult]) -> list[TopicResult]:
-        transcript = self.__create_full_transcript_message(chunks)
+        windows = self.__pack_topic_windows(chunks)
 
-        response = await self.__model.chat(
-            messages=[TextMessage(transcript)],
-            system_prompt=self.__topic_extraction_system_prompt,
-            schema=TopicExtractionSchema
-        )
+        if len(windows) <= 1:
+            topics = await self.__extract_topics_window("".join(windows))
+        else:
+            self.__logger.info(f"Extracting topics from {len(windows)} overlapping transcript windows")
+            window_topics = await self.__map_bounded(self.__extract_topics_window, windows)
+            topics = self.__merge_topics(window_topics)
 
-        try:
-            result_dict = json.loads(response)
-            topics = [
-                TopicResult(
-                    title=t["title"],
-                    start_time_ms=t["start_time_ms"],
-                    end_time_ms=t["end_time_ms"],
-                    summary=t["summary"],
-                    tags=t["tags"],
-                    virality_score=t["virality_score"],
-                    virality_reasoning=t["virality_reasoning"]
-                ) for t in result_dict.get("topics", [])
-            ]
-            topics_sorted = sorted(topics, key=lambda t: t.virality_score, reverse=True)
-            return topics_sorted
-        except (json.JSONDecodeError, KeyError) as e:
-            self.__logger.error(f"Failed to parse topics JSON: {e}")
-            return []
+        return sorted(topics, key=lambda t: t.virality_score, reverse=True)
 
     async def normalize_tags(self, tags: list[str]) -> dict[str, str]:
         if not tags:
@@ -164,20 +236,18 @@ class LanguageService:
 
         tags_str = ", ".join(set(tags))
 
-        response = await self.__model.chat(
-            messages=[TextMessage(tags_str)],
-            system_prompt=self.__tag_normalization_system_prompt,
-            schema=MacroTagMappingSchema
-        )
-
         try:
-            result_dict = json.loads(response)
-            mapping_list = result_dict.get("mapping", [])
-            return {item["original_tag"]: item["macro_category"] for item in mapping_list}
-        except (json.JSONDecodeError, KeyError) as e:
+            result = await self.__structured_output.generate(
+                messages=[TextMessage(tags_str)],
+                system_prompt=self.__tag_normalization_system_prompt,
+                schema=MacroTagMappingSchema
+            )
+        except StructuredOutputError as e:
             self.__logger.error(f"Failed to parse macro tags JSON: {e}")
             return {}
 
+        return {item.original_tag: item.macro_category for item in result.mapping}
+
     async def generate_social_post(self, transcript_slice: str, post_type: PostType) -> str:
         if post_type == PostType.TIKTOK_SCENARIO:
             system_prompt = self.__tiktok_scenario_system_prompt
@@ -197,6 +267,68 @@ class LanguageService:
         remaining_seconds = seconds % 60
         return f"{minutes}:{remaining_seconds:02d}"
 
+    async def __map_bounded(self, func: Callable[[T], Awaitable[R]], items: list[T]) -> list[R]:
+        """
+        Runs func for every item, at most as many at once as the concurrency limiter allows.
+        Results are in the same order as items. The first failure cancels the remaining calls.
+        """
+        if self.__concurrency_limiter is None:
+            return [await func(item) for item in items]
+
+        async def run(item: T) -> R:
+            async with self.__concurrency_limiter:
+                return await func(item)
+
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(run(item)) for item in items]
+
+        return [task.result() for task in tasks]
+
+    def __pack_summaries(self, chunk_summaries: list[ChunkSummaryResponse]) -> list[list[ChunkSummaryResponse]]:
+        """
+        Groups consecutive summaries into batches that fit the token budget and the fan-in.
+        A batch always takes at least two summaries, so every level of the tree gets smaller.
+        """
+        batches: list[list[ChunkSummaryResponse]] = []
+        batch: list[ChunkSummaryResponse] = []
+        batch_tokens = 0
+
+        for chunk in chunk_summaries:
+            tokens = estimate_tokens(self.__create_chunk_message(chunk.text, chunk.start_time_ms, chunk.end_time_ms))
+
+            is_full = (len(batch) >= self.__overall_summary_fan_in
+                       or batch_tokens + tokens > self.__overall_summary_token_budget)
+            if len(batch) >= 2 and is_full:
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+
+            batch.append(chunk)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    async def __reduce_summaries(self, chunk_summaries: list[ChunkSummaryResponse]) -> str:
+        summaries = ""
+
+        for chunk in chunk_summaries:
+            summaries += self.__create_chunk_message(
+                chunk.text,
+                chunk.start_time_ms,
+                chunk.end_time_ms) + "\n\n\n"
+
+        response = await self.__model.chat(
+            messages=[
+                TextMessage(summaries)
+            ],
+            system_prompt=self.__overall_summary_system_prompt
+        )
+
+        return response
+
     async def __summarize_chunk(self, chunk : TranscriptionChunkResult) -> str:
         message = self.__create_chunk_message(chunk.text, chunk.start_time_ms, chunk.end_time_ms)
 
@@ -207,6 +339,9 @@ class LanguageService:
             system_prompt=self.__summary_system_prompt
         )
 
+        self.__logger.info(
+            f"Summarized chunk at {chunk.start_time_ms}, summary length: {len(response)}")
+
         return response
 
     def __create_chunk_message(self, text: str, start_ms: int, end_ms: int):
@@ -216,73 +351,263 @@ class LanguageService:
         return (f"[Chunk {start_minutes_seconds} - {end_minutes_seconds}]"
                 f"\n{text}")
 
-    def __create_full_transcript_message(self, chunks: list[TranscriptionChunkResult]) -> str:
-        text = ""
-        for chunk in chunks:
-            start = self.__ms_to_minutes_seconds(chunk.start_time_ms)
-            end = self.__ms_to_minutes_seconds(chunk.end_time_ms)
-            text += f"[{start} - {end}] (MS: {chunk.start_time_ms} - {chunk.end_time_ms})\n{chunk.text}\n\n"
-        return text
+    def __create_transcript_entry(self, chunk: TranscriptionChunkResult) -> str:
+        return f"{self.__create_transcript_header(chunk)}\n{self.__create_timed_text(chunk)}\n\n"
+
+    def __create_transcript_header(self, chunk: TranscriptionChunkResult) -> str:
+        start = self.__ms_to_minutes_seconds(chunk.start_time_ms)
+        end = self.__ms_to_minutes_seconds(chunk.end_time_ms)
+        return f"[{start} - {end}] (MS: {chunk.start_time_ms} - {chunk.end_time_ms})"
+
+    def __pack_topic_windows(self, chunks: list[TranscriptionChunkResult]) -> list[str]:
+        """
+        Groups consecutive transcript lines (sub-segments, or sentences of chunks without them)
+        into windows of at most topic_window_tokens, each starting with the last lines of the previous window,
+        up to topic_window_overlap_tokens. Every window takes at least one line the previous window did not have.
+        Every window repeats the header of each chunk it has lines of.
+        """
+        if self.__topic_window_tokens <= 0:
+            return ["".join(self.__create_transcript_entry(chunk) for chunk in chunks)]
+
+        headers = [self.__create_transcript_header(chunk) for chunk in chunks]
+        header_tokens = [estimate_tokens(header) for header in headers]
+        # (index of the chunk, line)
+        lines = [
+            (i, line)
+            for i, chunk in enumerate(chunks)
+            for line in self.__split_transcript_lines(chunk)
+        ]
+        tokens = [estimate_tokens(line) for _, line in lines]
+
+        windows: list[str] = []
+        start = 0
+
+        while start < len(lines):
+            end = start
+            window_tokens = 0
+            while end < len(lines):
+                cost = tokens[end]
+                if end == start or lines[end - 1][0] != lines[end][0]:
+                    cost += header_tokens[lines[end][0]]
+                if end > start and window_tokens + cost > self.__topic_window_tokens:
+                    break
+                window_tokens += cost
+                end += 1
+
+            windows.append(self.__render_topic_window(lines[start:end], headers))
+            if end >= len(lines):
+                break
+
+            next_start = end
+            overlap_tokens = 0
+            while next_start - 1 > start and overlap_tokens + tokens[next_start - 1] <= self.__topic_window_overlap_tokens:
+                next_start -= 1
+                overlap_tokens += tokens[next_start]
+            start = next_start
+
+        return windows
+
+    def __split_transcript_lines(self, chunk: TranscriptionChunkResult) -> list[str]:
+        """
+        The lines of a chunk's timed text, long lines split at sentences and if need be at words,
+        so no line takes more than a fraction of a window.
+        """
+        limit = max(1, self.__topic_window_tokens // 8)
+        lines: list[str] = []
+
+        for line in self.__create_timed_text(chunk).split("\n"):
+            if not line.strip():
+                continue
+            if estimate_tokens(line) <= limit:
+                lines.append(line)
+                continue
+
+            pieces: list[str] = []
+            for sentence in _SENTENCE_END_RE.split(line):
+                if estimate_tokens(sentence) <= limit:
+                    pieces.append(sentence)
+                else:
+                    pieces.extend(sentence.split())
+
+            current: list[str] = []
+            for piece in pieces:
+                if current and estimate_tokens(" ".join(current + [piece])) > limit:
+                    lines.append(" ".join(current))
+                    current = []
+                current.append(piece)
+            if current:
+                lines.append(" ".join(current))
+
+        return lines
+
+    def __render_topic_window(self, lines: list[tuple[int, str]], headers: list[str]) -> str:
+        parts: list[str] = []
+        for i, (chunk_index, line) in enumerate(lines):
+            if i == 0 or lines[i - 1][0] != chunk_index:
+                if parts:
+                    parts.append("\n")
+                parts.append(f"{headers[chunk_index]}\n")
+            parts.append(f"{line}\n")
+        parts.append("\n")
+        return "".join(parts)
+
+    async def __extract_topics_window(self, transcript: str) -> list[TopicResult]:
+        try:
+            result = await self.__structured_output.generate(
+                messages=[TextMessage(transcript)],
+                system_prompt=self.__topic_extraction_system_prompt,
+                schema=TopicExtractionSchema
+            )
+        except StructuredOutputError as e:
+            self.__logger.error(f"Failed to parse topics JSON: {e}")
+            return []
+
+        return [
+            TopicResult(
+                title=t.title,
+                start_time_ms=t.start_time_ms,
+                end_time_ms=t.end_time_ms,
+                summary=t.summary,
+                tags=t.tags,
+                virality_score=t.virality_score,
+                virality_reasoning=t.virality_reasoning
+            ) for t in result.topics
+        ]
+
+    def __merge_topics(self, window_topics: list[list[TopicResult]]) -> list[TopicResult]:
+        """
+        A topic found again in the next window is merged when it shares at least half of the shorter one.
+        Only topics of neighbouring windows are merged, so distinct topics of the same window stay apart.
+        The merged topic spans both, keeps the text of the higher scored one and the tags of both.
+        """
+        merged: list[TopicResult] = []
+        # the last window every merged topic was found in
+        last_windows: list[int] = []
+
+        for window, topics in enumerate(window_topics):
+            for topic in topics:
+                match = self.__find_overlapping_topic(topic, merged, last_windows, window - 1)
+                if match is None:
+                    merged.append(topic)
+                    last_windows.append(window)
+                    continue
+
+                previous = merged[match]
+                best = previous if previous.virality_score >= topic.virality_score else topic
+                merged[match] = TopicResult(
+                    title=best.title,
+                    start_time_ms=min(previous.start_time_ms, topic.start_time_ms),
+                    end_time_ms=max(previous.end_time_ms, topic.end_time_ms),
+                    summary=best.summary,
+                    tags=list(dict.fromkeys(previous.tags + topic.tags)),
+                    virality_score=best.virality_score,
+                    virality_reasoning=best.virality_reasoning
+                )
+                # now belongs to this window, another topic of the same window cannot merge into it
+                last_windows[match] = window
+
+        return sorted(merged, key=lambda t: (t.start_time_ms, t.end_time_ms))
+
+    def __find_overlapping_topic(
+            self,
+            topic: TopicResult,
+            merged: list[TopicResult],
+            last_windows: list[int],
+            window: int) -> int | None:
+        best_index: int | None = None
+        best_shared_ms = 0
+
+        for i, candidate in enumerate(merged):
+            if last_windows[i] != window:
+                continue
+
+            shared_ms = min(candidate.end_time_ms, topic.end_time_ms) - max(candidate.start_time_ms, topic.start_time_ms)
+            shorter_ms = min(candidate.end_time_ms - candidate.start_time_ms, topic.end_time_ms - topic.start_time_ms)
+            if shared_ms > 0 and shared_ms * 2 >= shorter_ms and shared_ms > best_shared_ms:
+                best_index = i
+                best_shared_ms = shared_ms
+
+        return best_index
+
+    def __create_timed_text(self, chunk: TranscriptionChunkResult) -> str:
+        # sub-segment offsets let topic boundaries land on the exact sentence instead of the chunk edge
+        if not chunk.segment_offsets_ms or not chunk.segment_texts:
+            return chunk.text
+
+        return "\n".join(
+            f"(MS: {offset}) {text}"
+            for offset, text in zip(chunk.segment_offsets_ms, chunk.segment_texts)
+        )
+
+    def __count_mentions(
+            self,
+            entity_relations: EntityRelations,
+            chunk_index: int,
+            mentions: Counter[str],
+            last_seen: dict[str, int]):
+        names = [entity.name for entity in entity_relations.entities]
+        for rel in entity_relations.relationships:
+            names.extend((rel.source_entity, rel.target_entity))
+
+        for name in names:
+            mentions[name] += 1
+            last_seen[name] = chunk_index
+
+    def __create_compact_entity_context(self, mentions: Counter[str], last_seen: dict[str, int]) -> str:
+        ranked = sorted(mentions, key=lambda name: (mentions[name], last_seen[name]), reverse=True)
+        selected = set(ranked[:self.__entity_context_limit])
+        # listed in order of first mention, so consecutive prompts share a prefix the model server can reuse
+        names = [name for name in mentions if name in selected]
+
+        # same shape as a full EntityRelations dump, so the system prompt's example still applies
+        return json.dumps({
+            "entities": [{"name": name} for name in names],
+            "relationships": []
+        }, ensure_ascii=False)
 
     async def __extract_entity_relations_chunk(
             self,
             chunk: TranscriptionChunkResult,
-            existing_entity_relations: EntityRelations
+            existing_context: str
     ) -> EntityRelations:
         start_minutes_seconds = self.__ms_to_minutes_seconds(chunk.start_time_ms)
         end_minutes_seconds = self.__ms_to_minutes_seconds(chunk.end_time_ms)
 
-        existing_entity_relations_json = existing_entity_relations.model_dump_json(indent=2)
-        existing_entity_relations_prompt = f"[Existing entities and relations]\n{existing_entity_relations_json}"
+        existing_entity_relations_prompt = f"[Existing entities and relations]\n{existing_context}"
         transcript_prompt = f"[Chunk {start_minutes_seconds} - {end_minutes_seconds}]\n{chunk.text}"
 
-        retries = 5
-        last_exception : Exception | None = None
-        result : dict | None = None
-
-        for i in range(1, retries+1):
-            try:
-                response: str = await self.__model.chat(
-                    messages=[
-                        TextMessage(existing_entity_relations_prompt),
-                        TextMessage(transcript_prompt)
-                    ],
-                    system_prompt=self.__entity_system_prompt,
-                    schema=EntityRelationsSchema
-                )
-
-                self.__logger.info(response)
-
-                result: dict = json.loads(response)
-
-                break
-            except JSONDecodeError as e:
-                last_exception = e
-                self.__logger.warning(
-                    f"JSON decode failed for chunk at {chunk.start_time_ms}. Retrying ({i} out of {retries})")
-
-        if result is None and last_exception is not None:
-            self.__logger.warning(f"JSON decode failed for chunk at {chunk.start_time_ms}. Falling back to empty result")
-            result = dict()
+        try:
+            result = await self.__structured_output.generate(
+                messages=[
+                    TextMessage(existing_entity_relations_prompt),
+                    TextMessage(transcript_prompt)
+                ],
+                system_prompt=self.__entity_system_prompt,
+                schema=EntityRelationsSchema
+            )
+        except StructuredOutputError as e:
+            self.__logger.warning(
+                f"JSON decode failed for chunk at {chunk.start_time_ms}. Falling back to empty result: {e}")
+            result = EntityRelationsSchema(new_entities=[], new_relationships=[])
 
         entities = [
             Entity(
-                name=entity["name"],
+                name=entity.name,
                 chunk_start_time_ms=chunk.start_time_ms,
                 chunk_end_time_ms=chunk.end_time_ms
             )
-            for entity in result.get("new_entities", [])
+            for entity in result.new_entities
         ]
 
         relationships = [
             Relationship(
-                source_entity=rel["source_entity"],
-                target_entity=rel["target_entity"],
-                relation_description=rel["relation_description"],
+                source_entity=rel.source_entity,
+                target_entity=rel.target_entity,
+                relation_description=rel.relation_description,
                 chunk_start_time_ms=chunk.start_time_ms,
                 chunk_end_time_ms=chunk.end_time_ms
             )
-            for rel in result.get("new_relationships", [])
+            for rel in result.new_relationships
         ]
 
         return EntityRelations(
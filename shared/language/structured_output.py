@@ -0,0 +1,251 @@
+import contextlib
+import logging
+import re
+from logging import Logger
+from typing import TypeVar
+from prometheus_client import Counter
+from pydantic import BaseModel, ValidationError
+from .cached_language_model import bypass_language_cache
+from .incremental_json import IncrementalJsonValidator, JsonStreamError
+from .language_model import LanguageModel, TextMessage, FileMessage
+
+STRUCTURED_OUTPUT_COUNTER = Counter(
+    'nvideo_structured_output',
+    'Structured responses by how they were obtained: valid, repaired, fixed by the model, failed',
+    ['schema', 'outcome']
+)
+STRUCTURED_OUTPUT_ABORTED_COUNTER = Counter(
+    'nvideo_structured_output_aborted',
+    'Streamed generations aborted because they stopped being valid JSON',
+    ['schema']
+)
+
+FIX_JSON_SYSTEM_PROMPT = ("You repair invalid JSON. "
+                          "Return only the corrected JSON matching the schema, without any other text. "
+                          "Keep the content, only fix the structure.")
+
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = ("true", "false", "null")
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class StructuredOutputError(ValueError):
+    """
+    The model did not produce a response matching the schema, even after repairs.
+    """
+
+
+def repair_json(text: str) -> str | None:
+    """
+    Fixes the usual ways models break JSON: code fences and text around the document,
+    trailing commas, and output cut off in the middle, which is truncated back to the last
+    complete value and closed. Returns None when there is no JSON document in the text.
+    """
+    # reading starts at the first bracket and stops where the document ends, so an opening fence before it
+    # and a closing fence or text after it are skipped, while fences inside strings are kept
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        return None
+    text = text[min(starts):]
+
+    out: list[str] = []
+    stack: list[str] = []
+    # for every open object, whether the next string is a key
+    expect_key: list[bool] = []
+    in_string = False
+    escape = False
+    # where the document could be cut and closed, and which brackets are open there
+    safe_length = 0
+    safe_stack: tuple[str, ...] = ()
+    # a number or literal being read
+    token: list[str] = []
+
+    def end_token(at_end: bool = False):
+        nonlocal safe_length, safe_stack
+        if not token:
+            return
+        value = "".join(token)
+        token.clear()
+
+        # a literal cut off in the middle can only be one thing
+        if at_end:
+            completion = next((literal for literal in _LITERALS if literal.startswith(value)), None)
+            if completion is not None:
+                out.append(completion[len(value):])
+                value = completion
+
+        if value in _LITERALS or _NUMBER_RE.fullmatch(value):
+            safe_length, safe_stack = len(out), tuple(stack)
+
+    for character in text:
+        if in_string:
+            out.append(character)
+            if escape:
+                escape = False
+            elif character == "\\":
+                escape = True
+            elif character == '"':
+                in_string = False
+                is_key = stack[-1] == "{" and expect_key[-1]
+                if not is_key:
+                    safe_length, safe_stack = len(out), tuple(stack)
+            continue
+
+        if character.isspace() or character in '"{}[],:':
+            end_token()
+
+        if character == '"':
+            in_string = True
+            out.append(character)
+        elif character in "{[":
+            stack.append(character)
+            expect_key.append(character == "{")
+            out.append(character)
+            safe_length, safe_stack = len(out), tuple(stack)
+        elif character in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            if not stack:
+                break
+            stack.pop()
+            expect_key.pop()
+            out.append("}" if character == "}" else "]")
+            if not stack:
+                return "".join(out)
+            safe_length, safe_stack = len(out), tuple(stack)
+        elif character == ",":
+            safe_length, safe_stack = len(out), tuple(stack)
+            if stack and stack[-1] == "{":
+                expect_key[-1] = True
+            out.append(character)
+        elif character == ":":
+            if stack and stack[-1] == "{":
+                expect_key[-1] = False
+            out.append(character)
+        else:
+            if not character.isspace():
+                token.append(character)
+            out.append(character)
+
+    end_token(at_end=True)
+
+    # cut off: drop the incomplete tail and close whatever was open at the last complete value
+    repaired = "".join(out[:safe_length]).rstrip()
+    while repaired.endswith(","):
+        repaired = repaired[:-1].rstrip()
+    closers = {"{": "}", "[": "]"}
+    return repaired + "".join(closers[bracket] for bracket in reversed(safe_stack))
+
+
+class StructuredOutput:
+    """
+    Gets a response matching a pydantic schema out of a LanguageModel as cheaply as possible:
+    the response is validated as is, then after a local repair, and only then the model is asked
+    to fix its own output with a short prompt, instead of regenerating it from scratch.
+    With streaming, generations are aborted and regenerated as soon as they stop being valid JSON.
+    """
+    def __init__(
+            self,
+            model: LanguageModel,
+            logger: Logger = logging.getLogger(),
+            stream: bool = False,
+            max_generations: int = 5,
+            max_fix_attempts: int = 1
+    ):
+        """
+        :param max_generations: how many times a streamed generation may be aborted and started over.
+        :param max_fix_attempts: how many times the model is asked to fix a response that could not be repaired.
+        """
+        self.__model = model
+        self.__logger = logger
+        self.__stream = stream
+        self.__max_generations = max(1, max_generations)
+        self.__max_fix_attempts = max_fix_attempts
+
+    async def generate(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None,
+            schema: type[T]
+    ) -> T:
+        """
+        Raises StructuredOutputError when no valid response could be obtained.
+        """
+        response = await self.__respond(messages, system_prompt, schema)
+
+        result, error = self.__parse(response, schema, repair=False)
+        if result is not None:
+            STRUCTURED_OUTPUT_COUNTER.labels(schema=schema.__name__, outcome="valid").inc()
+            return result
+
+        result, error = self.__parse(response, schema, repair=True)
+        if result is not None:
+            self.__logger.info(f"Repaired {schema.__name__} response locally")
+            STRUCTURED_OUTPUT_COUNTER.labels(schema=schema.__name__, outcome="repaired").inc()
+            return result
+
+        for i in range(1, self.__max_fix_attempts + 1):
+            self.__logger.warning(
+                f"Invalid {schema.__name__} response, asking the model to fix it ({i} out of {self.__max_fix_attempts}): {error}")
+
+            # a cached answer to the same fix request already failed once
+            with bypass_language_cache():
+                response = await self.__model.chat(
+                    messages=[TextMessage(f"[Error]\n{error}\n\n[Invalid JSON]\n{response}")],
+                    system_prompt=FIX_JSON_SYSTEM_PROMPT,
+                    schema=schema
+                )
+
+            result, error = self.__parse(response, schema, repair=True)
+            if result is not None:
+                STRUCTURED_OUTPUT_COUNTER.labels(schema=schema.__name__, outcome="fixed").inc()
+                return result
+
+        STRUCTURED_OUTPUT_COUNTER.labels(schema=schema.__name__, outcome="failed").inc()
+        raise StructuredOutputError(f"No valid {schema.__name__} response: {error}")
+
+    async def __respond(
+            self,
+            messages: list[TextMessage | FileMessage],
+            system_prompt: str | None,
+            schema: type[T]
+    ) -> str:
+        if not self.__stream:
+            return await self.__model.chat(messages, system_prompt=system_prompt, schema=schema)
+
+        validator = IncrementalJsonValidator(schema)
+        for i in range(1, self.__max_generations + 1):
+            validator = IncrementalJsonValidator(schema)
+            # regenerations must reach the model, not replay the answer that was just aborted
+            with bypass_language_cache() if i > 1 else contextlib.nullcontext():
+                stream = self.__model.chat_stream(messages, system_prompt=system_prompt, schema=schema)
+                try:
+                    async for part in stream:
+                        validator.feed(part)
+                    return validator.text
+                except JsonStreamError as e:
+                    STRUCTURED_OUTPUT_ABORTED_COUNTER.labels(schema=schema.__name__).inc()
+                    self.__logger.warning(
+                        f"Aborted {schema.__name__} generation after {len(validator.text)} characters "
+                        f"({i} out of {self.__max_generations}): {e}")
+                finally:
+                    await stream.aclose()
+
+        # every generation went wrong, leave the rest to repair and fix
+        return validator.text
+
+    def __parse(self, response: str | None, schema: type[T], repair: bool) -> tuple[T | None, str]:
+        if response is None:
+            return None, "Empty response"
+
+        if repair:
+            repaired = repair_json(response)
+            if repaired is None:
+                return None, "No JSON object found"
+            response = repaired
+
+        try:
+            return schema.model_validate_json(response), ""
+        except ValidationError as e:
+            return None, str(e)
@@ -0,0 +1,18 @@
+import math
+import re
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# BPE vocabularies split long or rare words into pieces of roughly this many characters
+_CHARACTERS_PER_PIECE = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token count, close enough to what BPE tokenizers produce to size prompts.
+    Every punctuation mark counts as one token, every word as one token per four characters.
+    """
+    return sum(
+        max(1, math.ceil(len(match) / _CHARACTERS_PER_PIECE))
+        for match in _TOKEN_RE.findall(text)
+    )
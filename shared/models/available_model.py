@@ -3,6 +3,9 @@ from pydantic import BaseModel
 
 class ModelAvailable(BaseModel):
     model_name: str
+    # transcription workers only: how they cut audio into chunks, see TranscriptionResponse
+    chunk_length_ms: int | None = None
+    chunking: str | None = None
 
 class AvailableModelResponse(BaseModel):
     name: str
@@ -6,6 +6,7 @@ class CreateJobRequest(BaseModel):
     video_id: str
     action_models: list[str]
     user_id: int
+    reuse_transcription: bool = True
 
 class JobResponse(BaseModel):
     id: UUID
@@ -9,7 +9,14 @@ class TranscriptionChunkResult(BaseModel):
     text: str
     start_time_ms: int
     end_time_ms: int
+    # sub-segments reported by the model: absolute start of each one, parallel to segment_texts
+    segment_offsets_ms: list[int] | None = None
+    segment_texts: list[str] | None = None
 
 class TranscriptionResponse(BaseModel):
     job_id: UUID
-    result: list[TranscriptionChunkResult]
\ No newline at end of file
+    result: list[TranscriptionChunkResult]
+    chunk_length_ms: int | None = None
+    # how the audio was cut into chunks, e.g. "fixed" or "silence:-35:500". Transcriptions are only reused
+    # by jobs whose worker cuts the same way
+    chunking: str | None = None
\ No newline at end of file
@@ -0,0 +1,5 @@
+from .model_residency_manager import *
+
+__all__ = [
+    'ResidentModel', 'ModelResidencyManager'
+]
\ No newline at end of file
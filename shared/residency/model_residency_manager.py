@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import time
+from abc import abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from logging import Logger
+from typing import AsyncIterator, Protocol
+from prometheus_client import Counter, Gauge
+
+MODEL_LOADED_GAUGE = Gauge(
+    'nvideo_model_loaded',
+    'Whether the model is currently loaded',
+    ['model']
+)
+MODEL_RESIDENT_BYTES_GAUGE = Gauge(
+    'nvideo_model_resident_bytes',
+    'Approximate RSS taken by the model, measured when it was last loaded',
+    ['model']
+)
+MODEL_IN_USE_GAUGE = Gauge(
+    'nvideo_model_in_use',
+    'Number of requests currently using the model',
+    ['model']
+)
+MODEL_IDLE_SECONDS_GAUGE = Gauge(
+    'nvideo_model_idle_seconds',
+    'Seconds since the model was last used',
+    ['model']
+)
+MODEL_LOADS_COUNTER = Counter(
+    'nvideo_model_loads',
+    'Number of times the model was loaded',
+    ['model']
+)
+MODEL_UNLOADS_COUNTER = Counter(
+    'nvideo_model_unloads',
+    'Number of times the model was unloaded, by reason',
+    ['model', 'reason']
+)
+
+
+class ResidentModel(Protocol):
+    @abstractmethod
+    def ensure_loaded(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def unload(self):
+        raise NotImplementedError
+
+    def warm_up(self):
+        self.ensure_loaded()
+
+
+@dataclass
+class _ResidencyEntry:
+    name: str
+    model: ResidentModel
+    loaded: bool = False
+    in_use: int = 0
+    last_used: float = 0
+    resident_bytes: int = 0
+
+
+class ModelResidencyManager:
+    """
+    Tracks which models are loaded, how much memory they took and when they were last used.
+    Models are unloaded once they have been idle for idle_unload_seconds, and the least recently used idle ones
+    are unloaded while the RSS of the worker process is above memory_budget_bytes. Zero disables either limit.
+    Models in use are never unloaded.
+    """
+    def __init__(
+            self,
+            logger: Logger = logging.getLogger(),
+            idle_unload_seconds: float = 0,
+            memory_budget_bytes: int = 0
+    ):
+        self.__logger = logger
+        self.__idle_unload_seconds = idle_unload_seconds
+        self.__memory_budget_bytes = memory_budget_bytes
+        self.__entries: dict[str, _ResidencyEntry] = {}
+        # serializes loads and unloads, so memory measurements aren't mixed up between models
+        self.__lock = asyncio.Lock()
+
+    def register(self, name: str, model: ResidentModel):
+        entry = _ResidencyEntry(name=name, model=model, last_used=time.monotonic())
+        self.__entries[name] = entry
+
+        MODEL_LOADED_GAUGE.labels(model=name).set(0)
+        MODEL_IN_USE_GAUGE.labels(model=name).set_function(lambda: entry.in_use)
+        MODEL_IDLE_SECONDS_GAUGE.labels(model=name).set_function(
+            lambda: 0 if entry.in_use else time.monotonic() - entry.last_used)
+
+    @asynccontextmanager
+    async def use(self, name: str) -> AsyncIterator[ResidentModel]:
+        """
+        Loads the model if needed and keeps it resident until the context exits.
+        """
+        entry = self.__entries[name]
+        entry.in_use += 1
+        try:
+            if not entry.loaded:
+                async with self.__lock:
+                    if not entry.loaded:
+                        await self.__make_room(entry.resident_bytes, exclude=entry)
+                        await self.__load(entry)
+
+            yield entry.model
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+    async def warm_up(self, name: str):
+        """
+        Loads the model through use() and runs its warm_up in a worker thread.
+        """
+        start = time.monotonic()
+        async with self.use(name) as model:
+            await asyncio.to_thread(model.warm_up)
+        self.__logger.info(f"Warmed up model {name} in {time.monotonic() - start:.1f}s")
+
+    async def unload_idle(self) -> list[str]:
+        """
+        Unloads the models idle for longer than idle_unload_seconds,
+        then idle models while the process is over the memory budget. Returns their names.
+        """
+        unloaded = []
+        async with self.__lock:
+            if self.__idle_unload_seconds > 0:
+                now = time.monotonic()
+                for entry in self.__entries.values():
+                    if not entry.loaded or entry.in_use:
+                        continue
+                    if now - entry.last_used < self.__idle_unload_seconds:
+                        continue
+
+                    await self.__unload(entry, reason="idle")
+                    unloaded.append(entry.name)
+
+            unloaded.extend(await self.__make_room(0))
+        return unloaded
+
+    async def __make_room(self, needed_bytes: int, exclude: _ResidencyEntry | None = None) -> list[str]:
+        """
+        Unloads the least recently used idle models until needed_bytes more fit in the memory budget.
+        """
+        if self.__memory_budget_bytes <= 0:
+            return []
+
+        candidates = sorted(
+            (entry for entry in self.__entries.values() if entry.loaded and entry is not exclude),
+            key=lambda entry: entry.last_used
+        )
+        resident_bytes = get_process_rss_bytes()
+
+        unloaded = []
+        for entry in candidates:
+            if resident_bytes + needed_bytes <= self.__memory_budget_bytes:
+                break
+            if entry.in_use:
+                continue
+
+            await self.__unload(entry, reason="memory_budget")
+            unloaded.append(entry.name)
+            # the allocator doesn't always hand freed memory back, count what the model took when it was loaded
+            resident_bytes = min(get_process_rss_bytes(), resident_bytes - entry.resident_bytes)
+
+        if resident_bytes + needed_bytes > self.__memory_budget_bytes:
+            self.__logger.warning(
+                f"Memory budget of {self.__memory_budget_bytes} bytes exceeded: "
+                f"{resident_bytes + needed_bytes} bytes needed while the remaining models are in use")
+        return unloaded
+
+    async def __load(self, entry: _ResidencyEntry):
+        self.__logger.info(f"Loading model {entry.name}")
+        start = time.monotonic()
+        rss_before = get_process_rss_bytes()
+
+        await asyncio.to_thread(entry.model.ensure_loaded)
+
+        entry.resident_bytes = max(0, get_process_rss_bytes() - rss_before)
+        entry.loaded = True
+
+        MODEL_LOADED_GAUGE.labels(model=entry.name).set(1)
+        MODEL_RESIDENT_BYTES_GAUGE.labels(model=entry.name).set(entry.resident_bytes)
+        MODEL_LOADS_COUNTER.labels(model=entry.name).inc()
+        self.__logger.info(
+            f"Loaded model {entry.name} in {time.monotonic() - start:.1f}s, "
+            f"approximately {entry.resident_bytes // (1024 * 1024)} MB")
+
+    async def __unload(self, entry: _ResidencyEntry, reason: str):
+        # flip the flag before awaiting, so a concurrent use() waits for the lock and reloads
+        entry.loaded = False
+        await asyncio.to_thread(entry.model.unload)
+
+        MODEL_LOADED_GAUGE.labels(model=entry.name).set(0)
+        MODEL_UNLOADS_COUNTER.labels(model=entry.name, reason=reason).inc()
+        self.__logger.info(f"Unloaded model {entry.name} ({reason})")
+
+
+def get_process_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as file:
+            resident_pages = int(file.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
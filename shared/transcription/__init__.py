@@ -3,7 +3,8 @@ from .transcription_model import *
 from .transcription_service import *
 
 __all__ = [
-    'TranscriptionChunk',
-    'TranscriptionModel',
+    # pcm_transcription_model, pcm_transcription_service - unsafe because there might be services that do not have numpy installed
+    'TimedTranscription', 'TranscriptionChunk',
+    'TranscriptionModel', 'WholeFileTranscriptionError',
     'TranscriptionService'
 ]
\ No newline at end of file
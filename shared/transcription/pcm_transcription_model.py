@@ -0,0 +1,24 @@
+from abc import abstractmethod
+from typing import Protocol
+from numpy import ndarray
+from .transcription_chunk import TimedTranscription
+
+
+class PcmTranscriptionModel(Protocol):
+    @abstractmethod
+    def ensure_loaded(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def unload(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def transcribe_pcm(self, samples: ndarray, sample_rate: int) -> str | TimedTranscription:
+        raise NotImplementedError
+
+    async def transcribe_pcm_many(self, samples: list[ndarray], sample_rate: int) -> list[str | TimedTranscription]:
+        """
+        Same as TranscriptionModel.transcribe_many, for in-memory audio.
+        """
+        return [await self.transcribe_pcm(chunk_samples, sample_rate) for chunk_samples in samples]
@@ -0,0 +1,75 @@
+import asyncio
+from typing import AsyncGenerator
+from .transcription_chunk import TranscriptionChunk
+from .pcm_transcription_model import PcmTranscriptionModel
+from ..audio.pcm import PcmChunk, decode_pcm, detect_speech_pcm, split_pcm, split_pcm_regions, WHISPER_SAMPLE_RATE
+from ..audio.vad_splitter import pack_speech_regions
+
+
+class PcmTranscriptionService:
+    """
+    Decodes the whole file once and hands in-memory slices to the model,
+    instead of writing every chunk to disk and having the model decode it again.
+    """
+    def __init__(
+            self,
+            model: PcmTranscriptionModel,
+            sample_rate: int = WHISPER_SAMPLE_RATE,
+            batch_size: int = 1,
+            split_on_silence: bool = False,
+            silence_noise_db: float = -35,
+            min_silence_ms: int = 500):
+        """
+        :param split_on_silence: cut only at silences and skip non-speech audio, see split_audio_on_silence.
+        """
+        self.model = model
+        self.sample_rate = sample_rate
+        self.batch_size = max(1, batch_size)
+        self.split_on_silence = split_on_silence
+        self.silence_noise_db = silence_noise_db
+        self.min_silence_ms = min_silence_ms
+
+    async def transcribe(self, file_path, segment_length_ms) -> AsyncGenerator[TranscriptionChunk, None]:
+        async with decode_pcm(file_path, self.sample_rate) as samples:
+            if self.split_on_silence:
+                # silences are found in the decoded samples, the file isn't decoded a second time
+                regions = await asyncio.to_thread(
+                    detect_speech_pcm,
+                    samples,
+                    self.sample_rate,
+                    noise_db=self.silence_noise_db,
+                    min_silence_ms=self.min_silence_ms)
+                pcm_chunks = split_pcm_regions(
+                    samples, pack_speech_regions(regions, segment_length_ms), self.sample_rate)
+            else:
+                pcm_chunks = split_pcm(samples, segment_length_ms, self.sample_rate)
+
+            batch: list[PcmChunk] = []
+            for pcm_chunk in pcm_chunks:
+                batch.append(pcm_chunk)
+                if len(batch) < self.batch_size:
+                    continue
+
+                for chunk in await self.__transcribe_batch(batch):
+                    yield chunk
+                batch = []
+
+            if batch:
+                for chunk in await self.__transcribe_batch(batch):
+                    yield chunk
+
+    async def __transcribe_batch(self, pcm_chunks: list[PcmChunk]) -> list[TranscriptionChunk]:
+        if len(pcm_chunks) == 1:
+            transcriptions = [await self.model.transcribe_pcm(pcm_chunks[0].samples, self.sample_rate)]
+        else:
+            transcriptions = await self.model.transcribe_pcm_many(
+                [chunk.samples for chunk in pcm_chunks], self.sample_rate)
+
+        return [
+            TranscriptionChunk.from_transcription(
+                transcription,
+                start_time_ms=pcm_chunk.start_time_ms,
+                end_time_ms=pcm_chunk.end_time_ms
+            )
+            for pcm_chunk, transcription in zip(pcm_chunks, transcriptions, strict=True)
+        ]
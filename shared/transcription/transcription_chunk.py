@@ -1,7 +1,77 @@
 from dataclasses import dataclass
 
+@dataclass
+class TimedTranscription:
+    """
+    A transcription with the model's own sub-segment timings.
+    segment_offsets_ms[i] is where segment_texts[i] starts, relative to the start of the transcribed audio.
+    """
+    text: str
+    segment_offsets_ms: list[int]
+    segment_texts: list[str]
+
 @dataclass
 class TranscriptionChunk:
     text: str
     start_time_ms: int
-    end_time_ms: int
\ No newline at end of file
+    end_time_ms: int
+    # absolute start of every sub-segment, parallel to segment_texts. None if the model doesn't report timings
+    segment_offsets_ms: list[int] | None = None
+    segment_texts: list[str] | None = None
+
+    @staticmethod
+    def from_transcription(
+            transcription: str | TimedTranscription,
+            start_time_ms: int,
+            end_time_ms: int) -> 'TranscriptionChunk':
+        if not isinstance(transcription, TimedTranscription):
+            return TranscriptionChunk(
+                text=transcription,
+                start_time_ms=start_time_ms,
+                end_time_ms=end_time_ms
+            )
+
+        return TranscriptionChunk(
+            text=transcription.text,
+            start_time_ms=start_time_ms,
+            end_time_ms=end_time_ms,
+            segment_offsets_ms=[
+                min(start_time_ms + offset, end_time_ms)
+                for offset in transcription.segment_offsets_ms
+            ],
+            segment_texts=transcription.segment_texts
+        )
+
+    @staticmethod
+    def split_transcription(
+            transcription: str | TimedTranscription,
+            segment_length_ms: int,
+            duration_ms: int) -> list['TranscriptionChunk']:
+        """
+        Rebuilds fixed-length chunks out of one transcription of the whole audio,
+        as if it had been split at every segment_length_ms and each part transcribed on its own.
+        A segment belongs to the chunk it starts in. Without timings everything is one chunk.
+        """
+        if not isinstance(transcription, TimedTranscription):
+            return [TranscriptionChunk.from_transcription(transcription, start_time_ms=0, end_time_ms=duration_ms)]
+
+        segment_length_ms = max(1, segment_length_ms)
+        chunk_count = max(1, -(-duration_ms // segment_length_ms))
+        offsets: list[list[int]] = [[] for _ in range(chunk_count)]
+        texts: list[list[str]] = [[] for _ in range(chunk_count)]
+
+        for offset, text in zip(transcription.segment_offsets_ms, transcription.segment_texts, strict=True):
+            index = min(max(offset, 0) // segment_length_ms, chunk_count - 1)
+            offsets[index].append(min(max(offset, 0), duration_ms))
+            texts[index].append(text)
+
+        return [
+            TranscriptionChunk(
+                text=" ".join(text.strip() for text in texts[i] if text.strip()),
+                start_time_ms=i * segment_length_ms,
+                end_time_ms=min((i + 1) * segment_length_ms, duration_ms),
+                segment_offsets_ms=offsets[i],
+                segment_texts=texts[i]
+            )
+            for i in range(chunk_count)
+        ]
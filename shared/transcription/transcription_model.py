@@ -1,8 +1,24 @@
 from abc import abstractmethod
 from typing import Protocol
+from .transcription_chunk import TimedTranscription
+
+
+class WholeFileTranscriptionError(Exception):
+    """
+    Raised by a model that supports_whole_file when it could not transcribe a whole file in one call,
+    e.g. because the response was cut off. TranscriptionService then splits the file instead.
+    """
 
 
 class TranscriptionModel(Protocol):
+    @property
+    def supports_whole_file(self) -> bool:
+        """
+        Whether transcribe accepts audio of any length and returns a TimedTranscription,
+        so TranscriptionService can send the whole file in one call instead of splitting it.
+        """
+        return False
+
     @abstractmethod
     def ensure_loaded(self):
         raise NotImplementedError
@@ -11,6 +27,20 @@ class TranscriptionModel(Protocol):
     def unload(self):
         raise NotImplementedError
 
+    def warm_up(self):
+        """
+        Loads the model and runs a throwaway inference, so the first real request doesn't pay for either.
+        Called from a worker thread.
+        """
+        self.ensure_loaded()
+
     @abstractmethod
-    async def transcribe(self, file_path):
-        raise NotImplementedError
\ No newline at end of file
+    async def transcribe(self, file_path) -> str | TimedTranscription:
+        raise NotImplementedError
+
+    async def transcribe_many(self, file_paths: list[str]) -> list[str | TimedTranscription]:
+        """
+        Transcribes several files, results are in the same order as file_paths.
+        Transcribes one file at a time unless the model overrides it with real batched inference.
+        """
+        return [await self.transcribe(file_path) for file_path in file_paths]
\ No newline at end of file
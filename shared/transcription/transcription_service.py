@@ -1,24 +1,143 @@
+import asyncio
+import logging
 import os
-from typing import AsyncGenerator
-from . import TranscriptionModel, TranscriptionChunk
-from ..audio import split_audio
+from collections import deque
+from logging import Logger
+from typing import AsyncGenerator, Callable
+from . import TranscriptionModel, TranscriptionChunk, TimedTranscription, WholeFileTranscriptionError
+from ..audio import split_audio, encode_audio, AudioChunk, EncodeProfile
+from ..audio.audio_splitter import get_audio_info
 
 
 class TranscriptionService:
-    def __init__(self, model: TranscriptionModel):
+    def __init__(
+            self,
+            model: TranscriptionModel,
+            max_concurrency: int = 1,
+            batch_size: int = 1,
+            splitter: Callable[..., AsyncGenerator[AudioChunk, None]] = split_audio,
+            whole_file: bool = False,
+            max_whole_file_ms: int = 0,
+            encode_profile: EncodeProfile | None = None,
+            logger: Logger = logging.getLogger()):
+        """
+        :param max_concurrency: how many model calls may run at once.
+        :param batch_size: how many chunks are passed to a single TranscriptionModel.transcribe_many call.
+        :param splitter: split_audio, split_audio_on_silence or anything with the same signature.
+        :param whole_file: send the whole file in one call and rebuild the chunks from the model's timings.
+        Only used when the model supports_whole_file, the splitter is not used then.
+        Falls back to splitting when the model raises WholeFileTranscriptionError.
+        :param max_whole_file_ms: longer files are always split. Zero sends files of any length whole.
+        :param encode_profile: re-encode the file with this profile before it is sent whole,
+        pass the splitter's profile so whole files are uploaded like chunks. By default the original file is sent.
+        Chunks are always yielded in time order.
+        """
         self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.splitter = splitter
+        self.whole_file = whole_file
+        self.max_whole_file_ms = max_whole_file_ms
+        self.encode_profile = encode_profile
+        self.logger = logger
 
     async def transcribe(self, file_path, segment_length_ms) -> AsyncGenerator[TranscriptionChunk, None]:
-        async for audio_chunk in split_audio(file_path, segment_length_ms, use_temp_dir=True):
-            transcription = await self.model.transcribe(audio_chunk.chunk_path)
+        if self.whole_file and self.model.supports_whole_file:
+            chunks = await self.__transcribe_whole_file(file_path, segment_length_ms)
+            if chunks is not None:
+                for chunk in chunks:
+                    yield chunk
+                return
 
-            chunk = TranscriptionChunk(
-                text=transcription,
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending: deque[tuple[list[AudioChunk], asyncio.Task[list[str | TimedTranscription]]]] = deque()
+        batch: list[AudioChunk] = []
+
+        try:
+            async for audio_chunk in self.splitter(file_path, segment_length_ms, use_temp_dir=True):
+                batch.append(audio_chunk)
+                if len(batch) < self.batch_size:
+                    continue
+
+                pending.append((batch, asyncio.create_task(self.__transcribe_batch(batch, semaphore))))
+                batch = []
+
+                while pending and pending[0][1].done():
+                    for chunk in self.__to_transcription_chunks(*pending.popleft()):
+                        yield chunk
+
+            if batch:
+                pending.append((batch, asyncio.create_task(self.__transcribe_batch(batch, semaphore))))
+                batch = []
+
+            while pending:
+                audio_chunks, task = pending[0]
+                await task
+                for chunk in self.__to_transcription_chunks(*pending.popleft()):
+                    yield chunk
+        finally:
+            for _, task in pending:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+            for audio_chunks, _ in pending:
+                self.__remove_chunks(audio_chunks)
+            self.__remove_chunks(batch)
+
+    async def __transcribe_whole_file(self, file_path, segment_length_ms) -> list[TranscriptionChunk] | None:
+        """
+        Returns None when the file has to be split after all.
+        """
+        audio_info = await get_audio_info(file_path)
+        if 0 < self.max_whole_file_ms < audio_info.duration_ms:
+            self.logger.info(f"{file_path} is too long to be transcribed whole, splitting it")
+            return None
+
+        upload_path = file_path
+        if self.encode_profile is not None:
+            upload_path = await encode_audio(file_path, self.encode_profile, use_temp_dir=True)
+
+        try:
+            transcription = await self.model.transcribe(upload_path)
+        except WholeFileTranscriptionError as e:
+            self.logger.warning(f"Failed to transcribe {file_path} whole, splitting it: {e}")
+            return None
+        finally:
+            if upload_path != file_path and os.path.exists(upload_path):
+                os.remove(upload_path)
+
+        return TranscriptionChunk.split_transcription(
+            transcription,
+            segment_length_ms=segment_length_ms,
+            duration_ms=int(audio_info.duration_ms)
+        )
+
+    async def __transcribe_batch(
+            self,
+            audio_chunks: list[AudioChunk],
+            semaphore: asyncio.Semaphore) -> list[str | TimedTranscription]:
+        async with semaphore:
+            try:
+                if len(audio_chunks) == 1:
+                    return [await self.model.transcribe(audio_chunks[0].chunk_path)]
+
+                return await self.model.transcribe_many([chunk.chunk_path for chunk in audio_chunks])
+            finally:
+                self.__remove_chunks(audio_chunks)
+
+    def __to_transcription_chunks(
+            self,
+            audio_chunks: list[AudioChunk],
+            task: asyncio.Task[list[str | TimedTranscription]]) -> list[TranscriptionChunk]:
+        return [
+            TranscriptionChunk.from_transcription(
+                transcription,
                 start_time_ms=audio_chunk.start_time_ms,
                 end_time_ms=audio_chunk.end_time_ms
             )
+            for audio_chunk, transcription in zip(audio_chunks, task.result(), strict=True)
+        ]
 
-            yield chunk
-
+    def __remove_chunks(self, audio_chunks: list[AudioChunk]):
+        for audio_chunk in audio_chunks:
             if os.path.exists(audio_chunk.chunk_path):
-                os.remove(audio_chunk.chunk_path)
\ No newline at end of file
+                os.remove(audio_chunk.chunk_path)
@@ -1,12 +1,26 @@
 from . import TranscriptionChunk
 from ..models import TranscriptionChunkResult
 
+def describe_chunking(
+        split_on_silence: bool,
+        silence_noise_db: float = -35,
+        min_silence_ms: int = 500) -> str:
+    """
+    Identifies how a worker cuts audio into chunks. Together with the chunk length,
+    equal descriptions mean equal chunk boundaries for the same audio.
+    """
+    if not split_on_silence:
+        return "fixed"
+    return f"silence:{silence_noise_db:g}:{min_silence_ms}"
+
 def convert_to_chunk_results(chunks: list[TranscriptionChunk]) -> list[TranscriptionChunkResult]:
     return [
         TranscriptionChunkResult(
             text=chunk.text,
             start_time_ms=chunk.start_time_ms,
-            end_time_ms=chunk.end_time_ms
+            end_time_ms=chunk.end_time_ms,
+            segment_offsets_ms=chunk.segment_offsets_ms,
+            segment_texts=chunk.segment_texts
         )
         for chunk in chunks
     ]
\ No newline at end of file
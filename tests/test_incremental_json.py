@@ -0,0 +1,33 @@
+import pytest
+
+from shared.language.incremental_json import IncrementalJsonValidator
+
+
+@pytest.mark.parametrize("document", [
+    '{"a": 1}',
+    '[1, 2]',
+    '{"a": {"b": -2.5e3}}',
+    '{"a": [true, null, 1]}',
+])
+def test_document_ending_in_a_number_keeps_its_closing_bracket(document: str):
+    validator = IncrementalJsonValidator()
+
+    assert validator.feed(document)
+    assert validator.text == document
+
+
+def test_document_is_complete_when_fed_one_character_at_a_time():
+    validator = IncrementalJsonValidator()
+
+    for character in '{"a": 1}':
+        validator.feed(character)
+
+    assert validator.complete
+    assert validator.text == '{"a": 1}'
+
+
+def test_bare_number_ends_before_the_character_after_it():
+    validator = IncrementalJsonValidator()
+
+    assert validator.feed("12 ")
+    assert validator.text == "12"